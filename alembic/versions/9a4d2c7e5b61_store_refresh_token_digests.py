@@ -0,0 +1,40 @@
+"""Store refresh tokens as SHA-256 digests
+
+Revision ID: 9a4d2c7e5b61
+Revises: 3c5e1f0b7a2d
+Create Date: 2026-10-18 10:03:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4d2c7e5b61'
+down_revision: Union[str, Sequence[str], None] = '3c5e1f0b7a2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('refreshtoken', sa.Column('token_hash', sa.LargeBinary(length=32), nullable=True))
+    # Hash the existing tokens in place so live sessions keep working
+    op.execute("UPDATE refreshtoken SET token_hash = sha256(convert_to(token, 'UTF8'))")
+    op.alter_column('refreshtoken', 'token_hash', nullable=False)
+    op.drop_index(op.f('ix_refreshtoken_token'), table_name='refreshtoken')
+    op.drop_column('refreshtoken', 'token')
+    op.create_index(op.f('ix_refreshtoken_token_hash'), 'refreshtoken', ['token_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Raw tokens cannot be recovered from their digests, so every session ends
+    op.execute("DELETE FROM refreshtoken")
+    op.drop_index(op.f('ix_refreshtoken_token_hash'), table_name='refreshtoken')
+    op.drop_column('refreshtoken', 'token_hash')
+    op.add_column('refreshtoken', sa.Column('token', sqlmodel.sql.sqltypes.AutoString(), nullable=False))
+    op.create_index(op.f('ix_refreshtoken_token'), 'refreshtoken', ['token'], unique=True)
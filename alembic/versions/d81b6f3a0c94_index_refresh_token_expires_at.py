@@ -0,0 +1,30 @@
+"""Index refresh token expiry
+
+Revision ID: d81b6f3a0c94
+Revises: 9a4d2c7e5b61
+Create Date: 2026-10-18 10:41:15.227406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81b6f3a0c94'
+down_revision: Union[str, Sequence[str], None] = '9a4d2c7e5b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build the index without locking the table against concurrent logins
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_refreshtoken_expires_at'), 'refreshtoken', ['expires_at'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_refreshtoken_expires_at'), table_name='refreshtoken', postgresql_concurrently=True)
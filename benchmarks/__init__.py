@@ -0,0 +1,14 @@
+"""Benchmarks for the backend, run them with `python -m benchmarks.<name>`.
+
+They need no database or external services. The settings that have no
+default get harmless placeholder values so the suite runs on a bare checkout.
+"""
+
+from __future__ import annotations
+
+import os
+
+
+os.environ.setdefault("PROJECT_NAME", "benchmarks")
+os.environ.setdefault("ADMIN_EMAIL", "admin@benchmarks.local")
+os.environ.setdefault("ADMIN_PASSWORD", "benchmarks")
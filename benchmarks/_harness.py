@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import statistics
+import timeit
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterable
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    name: str
+    loops: int
+    mean_ns: float
+    stdev_ns: float
+
+    @property
+    def ops_per_sec(self) -> float:
+        return 1e9 / self.mean_ns
+
+    @property
+    def rel_stdev(self) -> float:
+        return self.stdev_ns / self.mean_ns
+
+
+def bench(name: str, fn: Callable[[], object], *, repeat: int = 5) -> BenchResult:
+    """Time `fn`, calibrating the loop count so each round lasts ~0.2 s."""
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    rounds = [total / loops * 1e9 for total in timer.repeat(repeat, loops)]
+    return BenchResult(
+        name=name,
+        loops=loops,
+        mean_ns=statistics.fmean(rounds),
+        stdev_ns=statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+    )
+
+
+def print_results(results: Iterable[BenchResult]) -> None:
+    print(f"{'benchmark':<40} {'mean':>12} {'ops/sec':>14} {'stdev':>8}")
+    for result in results:
+        print(
+            f"{result.name:<40} {result.mean_ns / 1000:>9.2f} us "
+            f"{result.ops_per_sec:>14,.0f} {result.rel_stdev:>7.1%}"
+        )
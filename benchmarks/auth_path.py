@@ -0,0 +1,143 @@
+"""Per-call cost of the functions on the authentication path.
+
+Each function is timed in isolation with the configured settings, so the
+bcrypt numbers follow PASSWORD_BCRYPT_ROUNDS. Everything runs on the CPU
+alone, no database or network, and coroutines are stepped synchronously
+since the timed code never awaits anything.
+"""
+
+from __future__ import annotations
+
+import argparse
+import uuid
+
+from datetime import UTC
+from datetime import datetime
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import cast
+
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+from sqlalchemy.dialects.sqlite.aiosqlite import SQLiteDialect_aiosqlite
+
+from benchmarks._harness import bench
+from benchmarks._harness import print_results
+from fastapi_react_example_backend.api.deps import get_current_principal
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.security import create_access_token
+from fastapi_react_example_backend.core.security import create_user_access_token
+from fastapi_react_example_backend.core.security import decode_access_token
+from fastapi_react_example_backend.core.security import get_password_hash
+from fastapi_react_example_backend.core.security import verify_access_token
+from fastapi_react_example_backend.core.security import verify_password
+from fastapi_react_example_backend.db.types import AwareDatetime
+from fastapi_react_example_backend.models.user import User
+from fastapi_react_example_backend.models.user import UserPublic
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Coroutine
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def run_sync[T](coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine that completes without suspending, with no event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as e:
+        result: T = e.value
+        return result
+    coroutine.close()
+    raise RuntimeError("The coroutine awaited something")
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    password = "benchmark-password"
+    hashed_password = get_password_hash(password)
+    user = User(
+        id=uuid.uuid4(),
+        email="bench@example.com",
+        full_name="Bench",
+        hashed_password=hashed_password,
+    )
+    token = create_access_token(user.id)
+
+    # The claims branch of get_current_principal needs a token carrying them
+    embed_claims = settings.ACCESS_TOKEN_EMBED_CLAIMS
+    settings.ACCESS_TOKEN_EMBED_CLAIMS = True
+    try:
+        embedded_token = create_user_access_token(user)
+    finally:
+        settings.ACCESS_TOKEN_EMBED_CLAIMS = embed_claims
+    decode_access_token(token)  # warm the verified token cache
+    decode_access_token(embedded_token)
+
+    column = AwareDatetime()
+    # The dialects the app runs on, in tests and in production
+    sqlite_dialect = SQLiteDialect_aiosqlite()
+    postgresql_dialect = PGDialect_asyncpg()  # type: ignore[no-untyped-call]
+    aware = datetime.now(UTC)
+    naive = aware.replace(tzinfo=None)
+    user_data = user.model_dump()
+    no_session = cast("AsyncSession", None)
+
+    return {
+        "verify_password": lambda: verify_password(password, hashed_password),
+        "get_password_hash": lambda: get_password_hash(password),
+        "create_access_token": lambda: create_access_token(user.id),
+        "create_user_access_token": lambda: create_user_access_token(user),
+        "verify_access_token": lambda: verify_access_token(token),
+        "decode_access_token (memoized)": lambda: decode_access_token(token),
+        "get_current_principal (claims)": lambda: run_sync(
+            # The claims branch never touches the session
+            get_current_principal(session=no_session, token=embedded_token)
+        ),
+        "process_bind_param (aware)": lambda: column.process_bind_param(
+            aware, postgresql_dialect
+        ),
+        "process_bind_param (naive)": lambda: column.process_bind_param(
+            naive, postgresql_dialect
+        ),
+        "process_result_value (sqlite)": lambda: column.process_result_value(
+            naive, sqlite_dialect
+        ),
+        "process_result_value (postgresql)": lambda: column.process_result_value(
+            aware, postgresql_dialect
+        ),
+        "UserPublic.model_validate (orm)": lambda: UserPublic.model_validate(
+            user, from_attributes=True
+        ),
+        "UserPublic.model_validate (dict)": lambda: UserPublic.model_validate(
+            user_data
+        ),
+        "UserPublic.model_construct": lambda: UserPublic.model_construct(
+            id=user.id,
+            email=user.email,
+            is_admin=user.is_admin,
+            full_name=user.full_name,
+        ),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-k", "--filter", default="", help="only run cases whose name contains it"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="timed rounds per case (default: 5)"
+    )
+    args = parser.parse_args(argv)
+
+    print(f"bcrypt rounds: {settings.PASSWORD_BCRYPT_ROUNDS}")
+    print_results(
+        bench(name, fn, repeat=args.repeat)
+        for name, fn in cases().items()
+        if args.filter in name
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+"""End-to-end load benchmark of the auth and user endpoints.
+
+It drives the real app, either in process through an ASGI transport or
+through a local uvicorn server, with a weighted mix of logins, token
+refreshes and `/users/me` calls, and reports throughput and latency
+percentiles per endpoint. See `python -m benchmarks.load --help`.
+
+Unlike the micro-benchmarks it needs a database: a throwaway SQLite file,
+or the Postgres server of the POSTGRES_* settings.
+"""
+
+from __future__ import annotations
+
+import os
+import secrets
+
+
+# Every uvicorn worker must verify the tokens the others sign
+os.environ.setdefault("SECRET_KEY", secrets.token_urlsafe(32))
+# Access logs of every call would measure the terminal more than the app
+os.environ.setdefault("LOG_LEVEL", "WARNING")
@@ -0,0 +1,225 @@
+"""Run the load benchmark, or compare two of its runs.
+
+    python -m benchmarks.load run --transport asgi --database sqlite -o a.json
+    python -m benchmarks.load compare a.json b.json --threshold 0.1
+
+`compare` exits with status 1 when the second run regresses.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import UTC
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+
+import httpx
+
+from benchmarks.load.app import DATABASE_URL_ENV
+from benchmarks.load.app import create_app
+from benchmarks.load.app import prepare_database
+from benchmarks.load.report import compare_runs
+from benchmarks.load.report import load_run
+from benchmarks.load.report import print_run
+from benchmarks.load.report import save_run
+from benchmarks.load.runner import OPERATIONS
+from benchmarks.load.runner import Operation
+from benchmarks.load.runner import run_load
+from fastapi_react_example_backend.core.config import settings
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+
+SERVER_START_TIMEOUT_SECONDS = 30.0
+
+
+def parse_mix(value: str) -> dict[Operation, float]:
+    """Parse `login=1,refresh=2,me=20` into weights per operation."""
+    mix: dict[Operation, float] = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        operation = next((op for op in OPERATIONS if op == name.strip()), None)
+        if operation is None:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}")
+        try:
+            mix[operation] = float(weight)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(f"Invalid weight {weight!r}") from e
+    return mix
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+@contextlib.asynccontextmanager
+async def asgi_client() -> AsyncIterator[httpx.AsyncClient]:
+    # Client and app share the event loop, so client overhead is included
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as c:
+        yield c
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_client(workers: int, limit: int) -> AsyncIterator[httpx.AsyncClient]:
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "benchmarks.load.app:create_app",
+            "--factory",
+            "--host=127.0.0.1",
+            f"--port={port}",
+            f"--workers={workers}",
+            # Seeding and the background tasks are not under test
+            "--lifespan=off",
+            "--no-access-log",
+            "--log-level=warning",
+        ],
+    )
+    limits = httpx.Limits(max_connections=limit, max_keepalive_connections=limit)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30.0
+        ) as client:
+            deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+            while True:
+                with contextlib.suppress(httpx.TransportError):
+                    if (await client.get("/")).is_success:
+                        break
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("The uvicorn server did not start")
+                await asyncio.sleep(0.1)
+            yield client
+    finally:
+        server.terminate()
+        server.wait()
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    with contextlib.ExitStack() as stack:
+        if args.database == "sqlite":
+            directory = stack.enter_context(tempfile.TemporaryDirectory())
+            database_url = f"sqlite+aiosqlite:///{directory}/load.db"
+            # Inherited by the uvicorn workers
+            os.environ[DATABASE_URL_ENV] = database_url
+        else:
+            database_url = str(settings.POSTGRES_ASYNC_URI)
+            os.environ.pop(DATABASE_URL_ENV, None)
+
+        await prepare_database(database_url, args.users)
+
+        client_context = (
+            asgi_client()
+            if args.transport == "asgi"
+            else uvicorn_client(args.workers, args.concurrency)
+        )
+        async with client_context as client:
+            results = await run_load(
+                client,
+                mix=args.mix,
+                concurrency=args.concurrency,
+                users=args.users,
+                duration=args.duration,
+                warmup=args.warmup,
+                seed=args.seed,
+            )
+
+    return {
+        "meta": {
+            "transport": args.transport,
+            "database": args.database,
+            "concurrency": args.concurrency,
+            "workers": args.workers if args.transport == "uvicorn" else None,
+            "mix": args.mix,
+            "users": args.users,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "bcrypt_rounds": settings.PASSWORD_BCRYPT_ROUNDS,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": datetime.now(UTC).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load", description=__doc__.splitlines()[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark")
+    run_parser.add_argument("--transport", choices=["asgi", "uvicorn"], default="asgi")
+    run_parser.add_argument(
+        "--database", choices=["sqlite", "postgres"], default="sqlite"
+    )
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument(
+        "--workers", type=int, default=1, help="uvicorn worker processes"
+    )
+    run_parser.add_argument(
+        "--users", type=int, default=100, help="distinct accounts logging in"
+    )
+    run_parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix("login=1,refresh=4,me=20"),
+        help="weights of the operations (default: login=1,refresh=4,me=20)",
+    )
+    run_parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    run_parser.add_argument(
+        "--warmup", type=float, default=2.0, help="seconds not counted"
+    )
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("-o", "--output", type=Path, help="write results as JSON")
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON runs")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("candidate", type=Path)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative change flagged as a regression (default: 0.1)",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        regressions = compare_runs(
+            load_run(args.baseline), load_run(args.candidate), threshold=args.threshold
+        )
+        for regression in regressions:
+            print(f"regression: {regression}")
+        return 1 if regressions else 0
+
+    result = asyncio.run(run(args))
+    print_run(result["results"])
+    if args.output is not None:
+        save_run(args.output, result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
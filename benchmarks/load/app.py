@@ -0,0 +1,93 @@
+"""The app under load, wired to the benchmark database."""
+
+from __future__ import annotations
+
+import os
+import uuid
+
+from typing import TYPE_CHECKING
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.security import get_password_hash
+from fastapi_react_example_backend.crud import user as user_crud
+from fastapi_react_example_backend.db.session import get_session
+from fastapi_react_example_backend.db.session import get_session_factory
+from fastapi_react_example_backend.main import app
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from fastapi import FastAPI
+
+
+# Set to run the app on another database than the Postgres of the settings
+DATABASE_URL_ENV = "LOAD_BENCH_DATABASE_URL"
+
+USER_PASSWORD = "load-benchmark-password"
+
+
+def user_email(index: int) -> str:
+    return f"load{index}@example.com"
+
+
+def create_app() -> FastAPI:
+    """Uvicorn factory of the app, also used in process.
+
+    Login throttling is turned off, the benchmark logs in far more often
+    than any real client would.
+    """
+    settings.LOGIN_RATE_LIMIT_ENABLED = False
+
+    database_url = os.environ.get(DATABASE_URL_ENV)
+    if database_url is None:
+        return app
+
+    session_factory = async_sessionmaker(
+        bind=create_async_engine(database_url),
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    async def get_benchmark_session() -> AsyncGenerator[AsyncSession]:
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_benchmark_session
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    return app
+
+
+async def prepare_database(database_url: str, users: int) -> None:
+    """Create the tables if needed, then the benchmark users if missing.
+
+    All users share one password, so it is hashed once, at the configured
+    cost, and logins never trigger a rehash.
+    """
+    engine = create_async_engine(database_url)
+    try:
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModel.metadata.create_all)
+
+        hashed_password = get_password_hash(USER_PASSWORD)
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "email": user_email(i),
+                "is_admin": False,
+                "full_name": f"Load {i}",
+                "hashed_password": hashed_password,
+                "version": 0,
+            }
+            for i in range(users)
+        ]
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            await user_crud.insert_users(session=session, rows=rows)
+    finally:
+        await engine.dispose()
@@ -0,0 +1,102 @@
+"""Printing, saving and comparing load benchmark runs."""
+
+from __future__ import annotations
+
+import json
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+# Meta fields that must match for two runs to be comparable
+COMPARABLE_META = ("transport", "database", "concurrency", "mix", "workers")
+
+# Higher is better for throughput, lower for latencies
+COMPARED_METRICS = {
+    "throughput": 1,
+    "p50_ms": -1,
+    "p95_ms": -1,
+    "p99_ms": -1,
+}
+
+
+def print_run(results: dict[str, dict[str, float]]) -> None:
+    print(
+        f"{'operation':<10} {'requests':>9} {'errors':>7} {'req/s':>9} "
+        f"{'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    )
+    for operation, summary in results.items():
+        latencies = " ".join(
+            f"{summary[name]:>6.1f} ms" if name in summary else f"{'-':>9}"
+            for name in ("p50_ms", "p95_ms", "p99_ms", "max_ms")
+        )
+        print(
+            f"{operation:<10} {summary['requests']:>9.0f} {summary['errors']:>7.0f} "
+            f"{summary['throughput']:>9.1f} {latencies}"
+        )
+
+
+def save_run(path: Path, run: dict[str, Any]) -> None:
+    path.write_text(json.dumps(run, indent=2) + "\n")
+
+
+def load_run(path: Path) -> dict[str, Any]:
+    run: dict[str, Any] = json.loads(path.read_text())
+    return run
+
+
+def _error_rate(summary: dict[str, float]) -> float:
+    return summary["errors"] / summary["requests"] if summary["requests"] else 0.0
+
+
+def compare_runs(
+    baseline: dict[str, Any], candidate: dict[str, Any], *, threshold: float
+) -> list[str]:
+    """Print how `candidate` fares against `baseline`, returning regressions.
+
+    A metric regresses when it is worse by more than `threshold`, a fraction
+    of the baseline value. A higher error rate than the baseline always does.
+    """
+    for name in COMPARABLE_META:
+        if baseline["meta"].get(name) != candidate["meta"].get(name):
+            print(
+                f"warning: the runs differ in {name}: "
+                f"{baseline['meta'].get(name)} vs {candidate['meta'].get(name)}"
+            )
+
+    regressions = []
+    print(f"{'operation':<10} {'metric':<11} {'baseline':>10} {'candidate':>10} change")
+    for operation, before in baseline["results"].items():
+        after = candidate["results"].get(operation)
+        if after is None:
+            continue
+
+        for metric, direction in COMPARED_METRICS.items():
+            if metric not in before or metric not in after or not before[metric]:
+                continue
+            change = (after[metric] - before[metric]) / before[metric]
+            regressed = change * direction < -threshold
+            flag = "  REGRESSION" if regressed else ""
+            print(
+                f"{operation:<10} {metric:<11} {before[metric]:>10.2f} "
+                f"{after[metric]:>10.2f} {change:>+7.1%}{flag}"
+            )
+            if regressed:
+                regressions.append(f"{operation} {metric} {change:+.1%}")
+
+        before_errors = _error_rate(before)
+        after_errors = _error_rate(after)
+        if after_errors > before_errors:
+            print(
+                f"{operation:<10} {'errors':<11} {before_errors:>10.2%} "
+                f"{after_errors:>10.2%}   REGRESSION"
+            )
+            regressions.append(
+                f"{operation} errors {before_errors:.2%} -> {after_errors:.2%}"
+            )
+
+    return regressions
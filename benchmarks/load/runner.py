@@ -0,0 +1,167 @@
+"""Virtual clients hammering the app, and the statistics of their calls."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import time
+
+from dataclasses import dataclass
+from dataclasses import field
+from typing import TYPE_CHECKING
+from typing import Literal
+
+import httpx
+
+from benchmarks.load.app import USER_PASSWORD
+from benchmarks.load.app import user_email
+from fastapi_react_example_backend.core.config import settings
+
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+
+type Operation = Literal["login", "refresh", "me"]
+
+OPERATIONS: tuple[Operation, ...] = ("login", "refresh", "me")
+
+LOGIN_PATH = f"{settings.ROUTER_API_V1_PREFIX}/auth/login/access-token"
+REFRESH_PATH = f"{settings.ROUTER_API_V1_PREFIX}/auth/login/refresh-token"
+ME_PATH = f"{settings.ROUTER_API_V1_PREFIX}/users/me"
+
+
+@dataclass
+class Samples:
+    """Latencies of the successful calls of one operation, and the failures."""
+
+    latencies_ns: list[int] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, duration: float) -> dict[str, float]:
+        latencies_ms = sorted(ns / 1_000_000 for ns in self.latencies_ns)
+        requests = len(latencies_ms) + self.errors
+        summary = {
+            "requests": requests,
+            "errors": self.errors,
+            "throughput": len(latencies_ms) / duration,
+        }
+        if len(latencies_ms) > 1:
+            percentiles = statistics.quantiles(latencies_ms, n=100, method="inclusive")
+            summary.update(
+                p50_ms=percentiles[49],
+                p95_ms=percentiles[94],
+                p99_ms=percentiles[98],
+                max_ms=latencies_ms[-1],
+            )
+        return summary
+
+
+class VirtualClient:
+    """One logged in user running operations back to back."""
+
+    def __init__(self, client: httpx.AsyncClient, email: str) -> None:
+        self.client = client
+        self.email = email
+        self.access_token = ""
+        self.refresh_token = ""
+
+    def _store_tokens(self, response: httpx.Response) -> None:
+        tokens = response.json()
+        self.access_token = tokens["access_token"]
+        self.refresh_token = tokens["refresh_token"]
+
+    async def login(self) -> httpx.Response:
+        response = await self.client.post(
+            LOGIN_PATH, data={"username": self.email, "password": USER_PASSWORD}
+        )
+        if response.is_success:
+            self._store_tokens(response)
+        return response
+
+    async def refresh(self) -> httpx.Response:
+        response = await self.client.post(
+            REFRESH_PATH, json={"refresh_token": self.refresh_token}
+        )
+        if response.is_success:
+            self._store_tokens(response)
+        return response
+
+    async def me(self) -> httpx.Response:
+        return await self.client.get(
+            ME_PATH, headers={"Authorization": f"Bearer {self.access_token}"}
+        )
+
+    async def run(
+        self,
+        mix: Mapping[Operation, float],
+        samples: Mapping[Operation, Samples],
+        *,
+        measure_from: float,
+        until: float,
+        rand: random.Random,
+    ) -> None:
+        operations = list(mix)
+        weights = list(mix.values())
+        await self.login()
+
+        while (started := time.perf_counter()) < until:
+            operation = rand.choices(operations, weights)[0]
+            started_ns = time.perf_counter_ns()
+            try:
+                response = await getattr(self, operation)()
+            except httpx.HTTPError:
+                response = None
+            elapsed_ns = time.perf_counter_ns() - started_ns
+
+            failed = response is None or not response.is_success
+            if started >= measure_from:
+                if failed:
+                    samples[operation].errors += 1
+                else:
+                    samples[operation].latencies_ns.append(elapsed_ns)
+            if failed and operation == "refresh":
+                await self.login()  # start over with a fresh refresh token
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    *,
+    mix: Mapping[Operation, float],
+    concurrency: int,
+    users: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+) -> dict[str, dict[str, float]]:
+    """Run `concurrency` virtual clients, returning per operation statistics.
+
+    Calls made during the first `warmup` seconds are not counted.
+    """
+    samples = {operation: Samples() for operation in mix}
+    measure_from = time.perf_counter() + warmup
+    until = measure_from + duration
+
+    await asyncio.gather(
+        *(
+            VirtualClient(client, user_email(i % users)).run(
+                mix,
+                samples,
+                measure_from=measure_from,
+                until=until,
+                rand=random.Random(seed + i),
+            )
+            for i in range(concurrency)
+        )
+    )
+
+    total = Samples(
+        latencies_ns=[ns for s in samples.values() for ns in s.latencies_ns],
+        errors=sum(s.errors for s in samples.values()),
+    )
+    results: dict[str, dict[str, float]] = {
+        operation: s.summary(duration) for operation, s in samples.items()
+    }
+    results["total"] = total.summary(duration)
+    return results
@@ -0,0 +1,99 @@
+"""Per-request cost of the logging middleware, with and without a separate
+request ID layer (asgi-correlation-id, a dev dependency) stacked on top."""
+
+from __future__ import annotations
+
+import asyncio
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+import structlog
+
+from asgi_correlation_id import CorrelationIdMiddleware
+
+from benchmarks._harness import bench
+from benchmarks._harness import print_results
+from fastapi_react_example_backend.middleware.structlog import AccessLogSampler
+from fastapi_react_example_backend.middleware.structlog import StructlogMiddleware
+
+
+if TYPE_CHECKING:
+    from starlette.types import ASGIApp
+    from starlette.types import Message
+    from starlette.types import Receive
+    from starlette.types import Scope
+    from starlette.types import Send
+
+
+REQUESTS_PER_ROUND = 100
+
+SCOPE: Scope = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/",
+    "raw_path": b"/",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [
+        (b"host", b"bench"),
+        (b"x-request-id", b"6b36d1eba28f499fa52c6aa456ead4d1"),
+    ],
+    "client": ("127.0.0.1", 50000),
+    "server": ("127.0.0.1", 8000),
+}
+
+
+async def endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+async def serve(app: ASGIApp) -> None:
+    for _ in range(REQUESTS_PER_ROUND):
+        await app(dict(SCOPE), receive, send)
+
+
+def main() -> None:
+    # Measure the middleware, not the log output
+    structlog.configure(logger_factory=structlog.ReturnLoggerFactory())
+    sampler = AccessLogSampler({"2xx": 0.0})
+
+    native = StructlogMiddleware(endpoint, sampler=sampler)
+    stacked = CorrelationIdMiddleware(StructlogMiddleware(endpoint, sampler=sampler))
+    sampled_in = StructlogMiddleware(endpoint)
+
+    loop = asyncio.new_event_loop()
+
+    def run(app: Any) -> None:
+        loop.run_until_complete(serve(app))
+
+    results = [
+        bench(f"native request ID (x{REQUESTS_PER_ROUND})", lambda: run(native)),
+        bench(
+            f"+ CorrelationIdMiddleware (x{REQUESTS_PER_ROUND})", lambda: run(stacked)
+        ),
+        bench(
+            f"native, every line logged (x{REQUESTS_PER_ROUND})",
+            lambda: run(sampled_in),
+        ),
+    ]
+    loop.close()
+
+    print_results(results)
+    print(f"stacking overhead: {results[1].mean_ns / results[0].mean_ns - 1:.0%}")
+
+
+if __name__ == "__main__":
+    main()
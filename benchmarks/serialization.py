@@ -0,0 +1,102 @@
+"""Per-request cost of turning a route's return value into a JSON body.
+
+"response_model" is what FastAPI does with a returned model: validate it
+against the `response_model`, dump it to JSON-compatible Python data and
+render that with the json module. "FastJSONResponse" is what routes do now:
+render the already validated model straight to JSON with pydantic-core.
+Building the page itself is left out, it is the same either way.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.utils import create_model_field
+
+from benchmarks._harness import bench
+from benchmarks._harness import print_results
+from fastapi_react_example_backend.api.responses import FastJSONResponse
+from fastapi_react_example_backend.api.v1.users import public_user
+from fastapi_react_example_backend.models.token import Token
+from fastapi_react_example_backend.models.user import UserPrincipal
+from fastapi_react_example_backend.models.user import UserPublic
+from fastapi_react_example_backend.models.user import UsersPublic
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from benchmarks._harness import BenchResult
+
+
+def via_response_model(response_model: type[Any]) -> Callable[[Any], bytes]:
+    field = create_model_field("Response", response_model, mode="serialization")
+
+    def render(content: Any) -> bytes:
+        value, _ = field.validate(content, {}, loc=("response",))
+        return bytes(JSONResponse(field.serialize(value)).body)
+
+    return render
+
+
+def via_fast_response(content: Any) -> bytes:
+    return bytes(FastJSONResponse(content).body)
+
+
+def compare(
+    name: str,
+    model: type[Any],
+    before: Callable[[], Any],
+    after: Callable[[], Any],
+) -> list[BenchResult]:
+    render = via_response_model(model)
+    # Both must produce the same document, or the comparison is meaningless
+    assert json.loads(render(before())) == json.loads(via_fast_response(after()))
+    return [
+        bench(f"{name} response_model", lambda: render(before())),
+        bench(f"{name} FastJSONResponse", lambda: via_fast_response(after())),
+    ]
+
+
+def main() -> None:
+    principal = UserPrincipal(
+        id=uuid.uuid4(), email="me@example.com", is_admin=False, full_name="Me"
+    )
+    token = Token(access_token="a" * 200, refresh_token="r" * 86)
+    page = UsersPublic(
+        data=[
+            UserPublic(
+                id=uuid.uuid4(),
+                email=f"user{i}@example.com",
+                full_name=f"User {i}",
+            )
+            for i in range(1000)
+        ],
+        count=1000,
+        next_cursor="bmV4dA==",
+    )
+
+    results = [
+        # /users/me used to validate the principal again, email included
+        *compare(
+            "UserPublic",
+            UserPublic,
+            lambda: UserPublic.model_validate(principal, from_attributes=True),
+            lambda: public_user(principal),
+        ),
+        *compare("Token", Token, lambda: token, lambda: token),
+        *compare("UsersPublic (1000 users)", UsersPublic, lambda: page, lambda: page),
+    ]
+    print_results(results)
+    for before, after in zip(results[::2], results[1::2], strict=True):
+        name = before.name.removesuffix(" response_model")
+        print(f"{name} speed-up: {before.mean_ns / after.mean_ns:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
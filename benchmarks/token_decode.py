@@ -0,0 +1,27 @@
+"""Cost of the JWT decode path of `get_current_user`, cold vs memoized."""
+
+from __future__ import annotations
+
+import uuid
+
+from benchmarks._harness import bench
+from benchmarks._harness import print_results
+from fastapi_react_example_backend.core.security import create_access_token
+from fastapi_react_example_backend.core.security import decode_access_token
+from fastapi_react_example_backend.core.security import verify_access_token
+
+
+def main() -> None:
+    token = create_access_token(uuid.uuid4())
+    decode_access_token(token)  # warm the verified token cache
+
+    results = [
+        bench("verify_access_token (uncached)", lambda: verify_access_token(token)),
+        bench("decode_access_token (memoized)", lambda: decode_access_token(token)),
+    ]
+    print_results(results)
+    print(f"speed-up: {results[0].mean_ns / results[1].mean_ns:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+import time
+
+
+# Taken before any submodule is imported, so the app can report how long its
+# imports took at cold start
+IMPORT_STARTED_NS = time.perf_counter_ns()
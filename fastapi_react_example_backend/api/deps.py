@@ -1,22 +1,43 @@
 from __future__ import annotations
 
-import uuid
+import ipaddress
 
+from typing import TYPE_CHECKING
 from typing import Annotated
+from typing import Literal
+from typing import NoReturn
 
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Request
 from fastapi import status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError
-from jose import jwt
-from pydantic import ValidationError
+from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import fastapi_react_example_backend.crud.user as user_crud
+
 from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.metrics import format_labels
+from fastapi_react_example_backend.core.metrics import registry
+from fastapi_react_example_backend.core.rate_limit import login_ip_limiter
+from fastapi_react_example_backend.core.rate_limit import login_username_limiter
+from fastapi_react_example_backend.core.rate_limit import signup_ip_limiter
+from fastapi_react_example_backend.core.security import ACCESS_TOKEN_CLAIMS_VERSION
+from fastapi_react_example_backend.core.security import InvalidAccessTokenError
+from fastapi_react_example_backend.core.security import decode_access_token
+from fastapi_react_example_backend.db.session import SessionFactory
 from fastapi_react_example_backend.db.session import get_session
-from fastapi_react_example_backend.models.token import TokenPayload
+from fastapi_react_example_backend.db.session import get_session_factory
 from fastapi_react_example_backend.models.user import User
+from fastapi_react_example_backend.models.user import UserPrincipal
+
+
+if TYPE_CHECKING:
+    import uuid
+
+    from fastapi_react_example_backend.core.rate_limit import RateLimiter
+    from fastapi_react_example_backend.models.token import TokenPayload
 
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -24,36 +45,34 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
+SessionFactoryDep = Annotated[SessionFactory, Depends(get_session_factory)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
+LoginFormDep = Annotated[OAuth2PasswordRequestForm, Depends()]
 
 
-async def get_current_user(session: SessionDep, token: TokenDep) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ACCESS_TOKEN_ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
 
-    except (JWTError, ValidationError) as e:
-        raise credentials_exception from e
+def _decode_token(token: str) -> tuple[uuid.UUID, TokenPayload]:
+    try:
+        return decode_access_token(token)
+    except InvalidAccessTokenError as e:
+        raise _credentials_exception() from e
 
-    if not token_data.sub:
-        raise credentials_exception
 
-    try:
-        user_id = uuid.UUID(token_data.sub)
-    except ValueError as e:
-        raise credentials_exception from e
+async def get_current_user(session: SessionDep, token: TokenDep) -> User:
+    user_id, _ = _decode_token(token)
 
-    user = await session.get(User, user_id)
+    user = await user_crud.get_user_by_id(
+        session=session, user_id=user_id, use_cache=True
+    )
     if not user:
-        raise credentials_exception
+        raise _credentials_exception()
 
     return user
 
@@ -68,3 +87,144 @@ async def get_current_user_is_admin(current_user: CurrentUserDep) -> User:
             detail="Unauthorized access",
         )
     return current_user
+
+
+async def get_current_principal(session: SessionDep, token: TokenDep) -> UserPrincipal:
+    """Build the caller's principal, straight from the token claims if possible.
+
+    Tokens issued with ACCESS_TOKEN_EMBED_CLAIMS carry everything needed, so
+    they are served without touching the database, as the user was when the
+    token was issued. Tokens without claims, or with claims of another
+    schema (`ver`), fall back to loading the user. Routes that must not act
+    on outdated claims check `version` against the user row, as
+    `get_current_principal_is_admin` does.
+    """
+    user_id, token_data = _decode_token(token)
+
+    if (
+        token_data.ver == ACCESS_TOKEN_CLAIMS_VERSION
+        and token_data.adm is not None
+        and token_data.email is not None
+        and token_data.uv is not None
+    ):
+        return UserPrincipal(
+            id=user_id,
+            email=token_data.email,
+            is_admin=token_data.adm,
+            full_name=token_data.name,
+            version=token_data.uv,
+        )
+
+    user = await user_crud.get_user_by_id(
+        session=session, user_id=user_id, use_cache=True
+    )
+    if not user:
+        raise _credentials_exception()
+
+    return UserPrincipal.model_validate(user, from_attributes=True)
+
+
+CurrentPrincipalDep = Annotated[UserPrincipal, Depends(get_current_principal)]
+
+
+async def get_current_principal_is_admin(
+    session: SessionDep, current_principal: CurrentPrincipalDep
+) -> UserPrincipal:
+    """Require a principal whose admin role is still current.
+
+    The user is loaded, from the principal cache if possible, and tokens
+    issued before its last update (an older `uv`) are rejected, so demoting
+    an admin takes effect before their tokens expire.
+    """
+    user = await user_crud.get_user_by_id(
+        session=session, user_id=current_principal.id, use_cache=True
+    )
+    if not user or user.version != current_principal.version:
+        raise _credentials_exception()
+    if not user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Unauthorized access",
+        )
+    return current_principal
+
+
+CurrentAdminPrincipalDep = Annotated[
+    UserPrincipal, Depends(get_current_principal_is_admin)
+]
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in settings.TRUSTED_PROXIES)
+
+
+def get_client_ip(request: Request) -> str:
+    """The address of the client, past the trusted proxies in front of the app.
+
+    X-Forwarded-For is read from the right, as each proxy appends the address
+    it got the request from, and only as far as the hops are trusted: the
+    entries left of them are whatever the client chose to send.
+    """
+    hops = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    hops.append(request.client.host if request.client else "unknown")
+
+    client_ip = hops.pop()
+    while hops and _is_trusted_proxy(client_ip):
+        client_ip = hops.pop()
+    return client_ip
+
+
+def _login_username_key(username: str) -> str:
+    return username.strip().lower()
+
+
+def _raise_throttled(
+    action: Literal["login", "signup"], limiter: RateLimiter, retry_after: int
+) -> NoReturn:
+    registry.inc(f"{action}_throttled_total", format_labels(limiter=limiter.name))
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Too many {action} attempts, try again later",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+async def check_login_rate_limit(request: Request, form_data: LoginFormDep) -> None:
+    """Reject throttled login attempts before any query or password hash.
+
+    Every attempt counts against the client IP, and it is checked first, so a
+    throttled client does not use up the attempts of the usernames it tries.
+    The username bucket is only checked here, failed attempts are counted by
+    `count_failed_login` so that logging in does not use it up.
+    """
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return
+
+    if retry_after := await login_ip_limiter.hit(get_client_ip(request)):
+        _raise_throttled("login", login_ip_limiter, retry_after)
+    username = _login_username_key(form_data.username)
+    if retry_after := await login_username_limiter.check(username):
+        _raise_throttled("login", login_username_limiter, retry_after)
+
+
+async def count_failed_login(username: str) -> None:
+    if settings.LOGIN_RATE_LIMIT_ENABLED:
+        await login_username_limiter.hit(_login_username_key(username))
+
+
+async def check_signup_rate_limit(request: Request) -> None:
+    """Reject throttled sign-ups before the password of any is hashed."""
+    if not settings.SIGNUP_RATE_LIMIT_ENABLED:
+        return
+
+    if retry_after := await signup_ip_limiter.hit(get_client_ip(request)):
+        _raise_throttled("signup", signup_ip_limiter, retry_after)
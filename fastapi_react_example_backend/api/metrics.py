@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.logging_config import get_log_queue_stats
+from fastapi_react_example_backend.core.metrics import MetricsRegistry
+from fastapi_react_example_backend.core.metrics import MetricsSnapshot
+from fastapi_react_example_backend.core.metrics import MultiprocessStore
+from fastapi_react_example_backend.core.metrics import format_labels
+from fastapi_react_example_backend.core.metrics import merge_snapshots
+from fastapi_react_example_backend.core.metrics import registry
+from fastapi_react_example_backend.core.metrics import render_prometheus
+from fastapi_react_example_backend.core.security import verified_token_cache
+from fastapi_react_example_backend.crud.user import principal_cache
+from fastapi_react_example_backend.crud.user import registered_emails
+from fastapi_react_example_backend.db.session import engine
+from fastapi_react_example_backend.db.session import get_pool_stats
+from fastapi_react_example_backend.db.session import replica_engines
+from fastapi_react_example_backend.tasks.periodic import PeriodicTask
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter()
+
+multiprocess_store = (
+    MultiprocessStore(settings.METRICS_MULTIPROCESS_DIR)
+    if settings.METRICS_MULTIPROCESS_DIR is not None
+    else None
+)
+
+
+def collect_cache_stats(metrics: MetricsRegistry) -> None:
+    for name, cache in (
+        ("principal", principal_cache),
+        ("verified_token", verified_token_cache),
+    ):
+        labels = format_labels(cache=name)
+        stats = cache.stats()
+        metrics.set_gauge("cache_entries", labels, stats["size"])
+        metrics.set_counter("cache_hits_total", labels, stats["hits"])
+        metrics.set_counter("cache_misses_total", labels, stats["misses"])
+
+
+def collect_pool_stats(metrics: MetricsRegistry) -> None:
+    engines = {"primary": engine}
+    engines.update({f"replica{i}": e for i, e in enumerate(replica_engines)})
+
+    for name, db_engine in engines.items():
+        stats = get_pool_stats(db_engine)
+        if stats is None:
+            continue
+
+        labels = format_labels(pool=name)
+        metrics.set_gauge("db_pool_checked_out", labels, stats["checked_out"])
+        metrics.set_gauge("db_pool_overflow", labels, stats["overflow"])
+        metrics.set_counter("db_pool_checkouts_total", labels, stats["checkouts"])
+        metrics.set_counter("db_pool_timeouts_total", labels, stats["timeouts"])
+        metrics.set_counter(
+            "db_pool_wait_seconds_total", labels, stats["wait_seconds_total"]
+        )
+
+
+def collect_email_filter_stats(metrics: MetricsRegistry) -> None:
+    metrics.set_gauge("email_filter_entries", "", len(registered_emails))
+    metrics.set_gauge("email_filter_capacity", "", registered_emails.capacity)
+
+
+def collect_log_queue_stats(metrics: MetricsRegistry) -> None:
+    stats = get_log_queue_stats()
+    if stats is None:
+        return
+
+    metrics.set_gauge("log_queue_size", "", stats["size"])
+    metrics.set_counter("log_queue_dropped_total", "", stats["dropped"])
+
+
+registry.add_collector(collect_cache_stats)
+registry.add_collector(collect_email_filter_stats)
+registry.add_collector(collect_log_queue_stats)
+registry.add_collector(collect_pool_stats)
+
+
+def _write_and_merge(
+    store: MultiprocessStore, snapshot: MetricsSnapshot
+) -> MetricsSnapshot:
+    store.write(snapshot)
+    return merge_snapshots(store.read_all())
+
+
+async def flush_metrics() -> None:
+    """Publish this worker's metrics for scrapes served by its siblings."""
+    if multiprocess_store is not None:
+        await run_in_threadpool(multiprocess_store.write, registry.snapshot())
+
+
+metrics_flush = PeriodicTask(
+    "metrics-flush", flush_metrics, interval=settings.METRICS_FLUSH_INTERVAL_SECONDS
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics() -> PlainTextResponse:
+    # The snapshot is taken on the event loop, where the registry is updated,
+    # only the file exchange with the other workers runs in a thread
+    snapshot = registry.snapshot()
+    if multiprocess_store is not None:
+        snapshot = await run_in_threadpool(
+            _write_and_merge, multiprocess_store, snapshot
+        )
+
+    return PlainTextResponse(
+        render_prometheus(snapshot, registry.buckets),
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
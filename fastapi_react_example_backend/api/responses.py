@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pydantic_core
+
+from fastapi.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by pydantic-core instead of the json module.
+
+    It is the default response class, so it renders whatever FastAPI made of
+    a route's return value. Routes can also return it wrapping a model they
+    already validated: FastAPI then passes it through untouched, skipping
+    the `response_model` validation and serialization, and the model is
+    written straight to JSON without an intermediate dict. Keep declaring
+    `response_model` on those routes for the OpenAPI schema.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
@@ -1,77 +1,112 @@
 from __future__ import annotations
 
-from datetime import UTC
-from datetime import datetime
-from typing import Annotated
-
 from fastapi import APIRouter
+from fastapi import BackgroundTasks
 from fastapi import Depends
 from fastapi import HTTPException
 from fastapi import status
-from fastapi.security import OAuth2PasswordRequestForm  # noqa: TC002
 
 import fastapi_react_example_backend.crud.user as user_crud
 
-from fastapi_react_example_backend.api.deps import SessionDep  # noqa: TC001
+from fastapi_react_example_backend.api.deps import LoginFormDep
+from fastapi_react_example_backend.api.deps import SessionDep
+from fastapi_react_example_backend.api.deps import SessionFactoryDep
+from fastapi_react_example_backend.api.deps import check_login_rate_limit
+from fastapi_react_example_backend.api.deps import count_failed_login
+from fastapi_react_example_backend.api.responses import FastJSONResponse
+from fastapi_react_example_backend.core.config import settings
 from fastapi_react_example_backend.core.security import create_access_token
+from fastapi_react_example_backend.core.security import create_user_access_token
+from fastapi_react_example_backend.core.security import password_needs_rehash
 from fastapi_react_example_backend.crud.token import create_refresh_token
-from fastapi_react_example_backend.crud.token import get_refresh_token
+from fastapi_react_example_backend.crud.token import rotate_refresh_token
 from fastapi_react_example_backend.models.token import RefreshTokenRequest
 from fastapi_react_example_backend.models.token import Token
+from fastapi_react_example_backend.tasks.password_rehash import rehash_user_password
 
 
 router = APIRouter()
 
 
-@router.post("/login/access-token", response_model=Token)
+@router.post(
+    "/login/access-token",
+    response_model=Token,
+    dependencies=[Depends(check_login_rate_limit)],
+)
 async def login_for_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
-) -> Token:
+    session: SessionDep,
+    session_factory: SessionFactoryDep,
+    background_tasks: BackgroundTasks,
+    form_data: LoginFormDep,
+) -> FastJSONResponse:
     user = await user_crud.authenticate(
         session=session, email=form_data.username, password=form_data.password
     )
 
     if not user:
+        await count_failed_login(form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = create_access_token(user.id, expires_delta=None)
-    refresh_token = await create_refresh_token(session=session, user_id=user.id)
+    if password_needs_rehash(user.hashed_password):
+        # Hashing at the new cost takes as long as the verification did, keep
+        # it out of the response time
+        background_tasks.add_task(
+            rehash_user_password,
+            session_factory,
+            user.id,
+            user.hashed_password,
+            form_data.password,
+        )
+
+    access_token = create_user_access_token(user, expires_delta=None)
+    _, refresh_token = await create_refresh_token(session=session, user_id=user.id)
 
-    return Token(
-        access_token=access_token,
-        refresh_token=refresh_token.token,
-        token_type="bearer",
+    return FastJSONResponse(
+        Token(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer",
+        )
     )
 
 
 @router.post("/login/refresh-token", response_model=Token)
 async def refresh_access_token(
     request: RefreshTokenRequest, session: SessionDep
-) -> Token:
-    refresh_token_db = await get_refresh_token(
-        session=session, token=request.refresh_token
-    )
-    if not refresh_token_db or refresh_token_db.expires_at < datetime.now(UTC):
+) -> FastJSONResponse:
+    rotated = await rotate_refresh_token(session=session, token=request.refresh_token)
+    if not rotated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired refresh token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    new_refresh_token_db, new_refresh_token = rotated
 
-    await session.delete(refresh_token_db)
-    await session.commit()
-
-    new_access_token = create_access_token(refresh_token_db.user_id, expires_delta=None)
-    new_refresh_token_db = await create_refresh_token(
-        session=session, user_id=refresh_token_db.user_id
-    )
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS:
+        user = await user_crud.get_user_by_id(
+            session=session, user_id=new_refresh_token_db.user_id
+        )
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        new_access_token = create_user_access_token(user, expires_delta=None)
+    else:
+        new_access_token = create_access_token(
+            new_refresh_token_db.user_id, expires_delta=None
+        )
 
-    return Token(
-        access_token=new_access_token,
-        refresh_token=new_refresh_token_db.token,
-        token_type="bearer",
+    return FastJSONResponse(
+        Token(
+            access_token=new_access_token,
+            refresh_token=new_refresh_token,
+            token_type="bearer",
+        )
     )
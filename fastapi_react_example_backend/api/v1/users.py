@@ -1,14 +1,224 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
+import uuid
+
+from contextlib import aclosing
+from typing import TYPE_CHECKING
+from typing import Annotated
+from typing import Literal
+
 from fastapi import APIRouter
+from fastapi import Depends
+from fastapi import Header
+from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Request
+from fastapi import status
+from fastapi.responses import StreamingResponse
 
-from fastapi_react_example_backend.api.deps import CurrentUserDep  # noqa: TC001
+import fastapi_react_example_backend.crud.user as user_crud
+
+from fastapi_react_example_backend.api.deps import CurrentPrincipalDep
+from fastapi_react_example_backend.api.deps import SessionDep
+from fastapi_react_example_backend.api.deps import SessionFactoryDep
+from fastapi_react_example_backend.api.deps import check_signup_rate_limit
+from fastapi_react_example_backend.api.deps import get_current_user_is_admin
+from fastapi_react_example_backend.api.responses import FastJSONResponse
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.record_stream import RECORD_FORMAT_MEDIA_TYPES
+from fastapi_react_example_backend.core.record_stream import RecordFormat
+from fastapi_react_example_backend.core.record_stream import RecordStreamError
+from fastapi_react_example_backend.core.record_stream import encode_records
+from fastapi_react_example_backend.core.record_stream import iter_records
+from fastapi_react_example_backend.models.user import UserImportReport
+from fastapi_react_example_backend.models.user import UserPrincipal
 from fastapi_react_example_backend.models.user import UserPublic
+from fastapi_react_example_backend.models.user import UserRegister
+from fastapi_react_example_backend.models.user import UsersPublic
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+    from fastapi_react_example_backend.db.session import SessionFactory
 
 
 router = APIRouter()
 
+UPLOAD_MEDIA_TYPES: dict[str, RecordFormat] = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "text/csv": "csv",
+}
+
+
+def public_user(principal: UserPrincipal) -> UserPublic:
+    # The principal was validated when it was loaded, skip doing it again
+    return UserPublic.model_construct(
+        id=principal.id,
+        email=principal.email,
+        is_admin=principal.is_admin,
+        full_name=principal.full_name,
+    )
+
+
+def encode_cursor(user: UserPublic) -> str:
+    raw = json.dumps([user.email, user.id.hex], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str, uuid.UUID]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor))
+        if not (
+            isinstance(payload, list)
+            and len(payload) == 2
+            and all(isinstance(value, str) for value in payload)
+        ):
+            raise ValueError("The cursor is not an [email, id] pair")
+        email, user_id = payload
+        return email, uuid.UUID(user_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from e
+
+
+@router.get(
+    "",
+    response_model=UsersPublic,
+    dependencies=[Depends(get_current_user_is_admin)],
+)
+async def read_users(
+    session: SessionDep,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+    count: Literal["none", "estimate", "exact"] = "estimate",
+) -> FastJSONResponse:
+    """Page through users ordered by email, following `next_cursor`.
+
+    The total defaults to an estimate from the planner statistics (exact on
+    databases without them). `count=exact` counts every row, which gets slow
+    on large tables, and `count=none` skips it.
+    """
+    after = decode_cursor(cursor) if cursor is not None else None
+    # One extra row tells whether there is a next page
+    users = await user_crud.list_users(session=session, limit=limit + 1, after=after)
+
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1])
+
+    total = None
+    if count != "none":
+        total = await user_crud.count_users(session=session, exact=count == "exact")
+
+    return FastJSONResponse(
+        UsersPublic(data=users, count=total, next_cursor=next_cursor)
+    )
+
+
+async def _export_users(
+    session_factory: SessionFactory, record_format: RecordFormat
+) -> AsyncGenerator[bytes]:
+    # An export closed early, as on a disconnect, closes its cursor before
+    # the session gives the connection back to the pool
+    async with (
+        session_factory() as session,
+        aclosing(
+            user_crud.stream_users(
+                session=session, batch_size=settings.USER_EXPORT_BATCH_SIZE
+            )
+        ) as batches,
+        aclosing(
+            encode_records(batches, list(UserPublic.model_fields), record_format)
+        ) as chunks,
+    ):
+        async for chunk in chunks:
+            yield chunk
+
+
+@router.get("/export", dependencies=[Depends(get_current_user_is_admin)])
+async def export_users(
+    session_factory: SessionFactoryDep,
+    record_format: Annotated[
+        Literal["ndjson", "csv"], Query(alias="format")
+    ] = "ndjson",
+) -> StreamingResponse:
+    """Stream every user's public fields as NDJSON or CSV.
+
+    Each chunk is only fetched once the previous one was sent, so a slow
+    client slows down the database cursor instead of filling memory.
+    """
+    return StreamingResponse(
+        _export_users(session_factory, record_format),
+        media_type=RECORD_FORMAT_MEDIA_TYPES[record_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{record_format}"'
+        },
+    )
+
+
+@router.post(
+    "/signup",
+    response_model=UserPublic,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(check_signup_rate_limit)],
+)
+async def register_user(session: SessionDep, user_in: UserRegister) -> FastJSONResponse:
+    user = await user_crud.register_user(session=session, user_register=user_in)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The email is already registered",
+        )
+    return FastJSONResponse(
+        UserPublic.model_validate(user, from_attributes=True),
+        status_code=status.HTTP_201_CREATED,
+    )
+
 
 @router.get("/me", response_model=UserPublic)
-async def read_user_me(current_user: CurrentUserDep) -> UserPublic:
-    return UserPublic.model_validate(current_user)
+async def read_user_me(current_user: CurrentPrincipalDep) -> FastJSONResponse:
+    return FastJSONResponse(public_user(current_user))
+
+
+@router.post(
+    "/import",
+    response_model=UserImportReport,
+    dependencies=[Depends(get_current_user_is_admin)],
+)
+async def import_users(
+    request: Request,
+    session: SessionDep,
+    content_type: Annotated[str, Header()] = "",
+    record_format: Annotated[
+        Literal["ndjson", "csv"] | None, Query(alias="format")
+    ] = None,
+) -> UserImportReport:
+    """Create users from an NDJSON or CSV upload, read as it streams in.
+
+    Records carry `email`, `password` and optionally `full_name` and
+    `is_admin`; a CSV upload names them in a header row. The format comes
+    from the `format` query parameter or else from the Content-Type.
+    """
+    if record_format is None:
+        media_type = content_type.partition(";")[0].strip().lower()
+        record_format = UPLOAD_MEDIA_TYPES.get(media_type)
+    if record_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload NDJSON (application/x-ndjson) or CSV (text/csv)",
+        )
+
+    records = iter_records(request.stream(), record_format)
+    try:
+        return await user_crud.import_users(session=session, records=records)
+    except RecordStreamError as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+        ) from e
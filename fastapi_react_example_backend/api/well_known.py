@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+
+from typing import TYPE_CHECKING
+from typing import Annotated
+
+import pydantic_core
+
+from fastapi import APIRouter
+from fastapi import Header
+from fastapi import Response
+from fastapi import status
+
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.security import access_token_keys
+
+
+if TYPE_CHECKING:
+    from fastapi_react_example_backend.core.token_keys import KeyRing
+
+
+router = APIRouter()
+
+
+@functools.cache
+def _encode_jwks(key_ring: KeyRing) -> tuple[bytes, str]:
+    body = pydantic_core.to_json(key_ring.jwks())
+    return body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+@router.get("/.well-known/jwks.json", response_class=Response)
+async def read_jwks(if_none_match: Annotated[str, Header()] = "") -> Response:
+    """Public keys that verify access tokens, for gateways and other services.
+
+    Caches may keep them for JWKS_CACHE_MAX_AGE_SECONDS, a new signing key is
+    only used once it has been published for longer than that.
+    """
+    body, etag = _encode_jwks(access_token_keys)
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_CACHE_MAX_AGE_SECONDS}",
+        "ETag": etag,
+    }
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/jwk-set+json", headers=headers)
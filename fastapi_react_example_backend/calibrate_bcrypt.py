@@ -0,0 +1,44 @@
+"""Pick the bcrypt cost for a target password verification latency.
+
+Run it on the hosts serving logins, then pin the printed value with the
+PASSWORD_BCRYPT_ROUNDS setting:
+
+    python -m fastapi_react_example_backend.calibrate_bcrypt --target-ms 250
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.security import calibrate_bcrypt_rounds
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250.0,
+        help="longest acceptable time to verify one password (default: 250)",
+    )
+    parser.add_argument(
+        "--samples",
+        type=int,
+        default=5,
+        help="verifications timed per cost, the median is kept (default: 5)",
+    )
+    args = parser.parse_args(argv)
+
+    rounds, timings = calibrate_bcrypt_rounds(
+        args.target_ms / 1000, samples=args.samples
+    )
+    for cost, elapsed in timings.items():
+        marker = " <-" if cost == rounds else ""
+        print(f"rounds={cost:<3} {elapsed * 1000:10.2f} ms{marker}")
+    print(f"\ncurrent: PASSWORD_BCRYPT_ROUNDS={settings.PASSWORD_BCRYPT_ROUNDS}")
+    print(f"suggested: PASSWORD_BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import time
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from typing import TypedDict
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Hashable
+
+
+class CacheStats(TypedDict):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+
+
+class TTLCache[K: Hashable, V]:
+    """Bounded LRU mapping whose entries expire after a time-to-live.
+
+    It is meant to be used from the event loop thread only, so it takes no
+    locks. A `max_size` of zero disables the cache: every lookup is a miss
+    and nothing is stored.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, *, expires_at: float | None = None) -> None:
+        """Store `value`, optionally expiring earlier than the default TTL.
+
+        `expires_at` is expressed in the cache clock, `time.monotonic` unless
+        another clock was given.
+        """
+        if self.max_size <= 0:
+            return
+
+        default_expires_at = self._clock() + self.ttl
+        if expires_at is None or expires_at > default_expires_at:
+            expires_at = default_expires_at
+
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self.hits,
+            misses=self.misses,
+        )
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+from pathlib import Path  # noqa: TC003 (pydantic needs it at runtime)
 from secrets import token_urlsafe
+from typing import Annotated
 from typing import Literal
+from typing import Self
 
+from pydantic import Field
+from pydantic import IPvAnyNetwork
 from pydantic import PostgresDsn
 from pydantic import computed_field
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from pydantic_settings import SettingsConfigDict
 
@@ -17,25 +23,122 @@ class Settings(BaseSettings):
     ENVIRONMENT: Literal["local", "development", "production"] = "local"
     PROJECT_NAME: str
     LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "INFO"
+    # Render and write log records on a background thread instead of the loop
+    LOG_QUEUE_ENABLED: bool = False
+    LOG_QUEUE_MAX_SIZE: int = 10_000
+    LOG_QUEUE_OVERFLOW_POLICY: Literal["block", "drop_oldest", "drop"] = "drop"
+    # Share of access log lines kept, by status class ("2xx") or by status class
+    # and route template ("2xx /api/v1/users/me"), unlisted ones are all kept
+    LOG_ACCESS_SAMPLE_RATES: dict[str, Annotated[float, Field(ge=0, le=1)]] = {}
+    # orjson needs the `fast-json` extra
+    LOG_JSON_SERIALIZER: Literal["json", "pydantic_core", "orjson"] = "json"
 
     ADMIN_EMAIL: str
     ADMIN_PASSWORD: str
+    # Create the admin user in every worker's lifespan. Turn it off when
+    # `python -m fastapi_react_example_backend.initial_data` runs before start.
+    SEED_ON_STARTUP: bool = True
 
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://127.0.0.1:5173"]
 
     ROUTER_API_V1_PREFIX: str = "/api/v1"
 
+    METRICS_ENABLED: bool = True
+    # Shared by the workers of one server so /metrics reports all of them
+    METRICS_MULTIPROCESS_DIR: Path | None = None
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # Only signs tokens when no key ring is configured below. The default is
+    # random per process, so such tokens only verify in the worker that made them.
     SECRET_KEY: str = token_urlsafe(32)
+    # Access token key ring, by key id, merged with one file per key id in
+    # ACCESS_TOKEN_KEYS_DIR. Every key verifies the tokens stamped with its id.
+    # PEM encoded EC private keys sign with ES256/ES384/ES512 depending on
+    # their curve and are published at /.well-known/jwks.json, other secrets
+    # sign with ACCESS_TOKEN_ALGORITHM.
+    ACCESS_TOKEN_KEYS: dict[str, str] = {}
+    ACCESS_TOKEN_KEYS_DIR: Path | None = None
+    # Key id that signs new tokens, required when the ring has several keys
+    ACCESS_TOKEN_SIGNING_KID: str | None = None
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 5
-    ACCESS_TOKEN_ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_ALGORITHM: Literal["HS256", "HS384", "HS512"] = "HS256"
+    JWKS_CACHE_MAX_AGE_SECONDS: int = 300
+    # Embed user claims in access tokens so read-only auth skips the database
+    ACCESS_TOKEN_EMBED_CLAIMS: bool = False
+    ACCESS_TOKEN_CACHE_MAX_SIZE: int = 10_000  # 0 disables the cache
 
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: float = 300.0  # 0 disables the reaper
+    REFRESH_TOKEN_PURGE_BATCH_SIZE: int = 1000
+
+    # Token buckets of login attempts, per client IP for every attempt and per
+    # submitted username for failed ones. Buckets are kept in the memory of
+    # each worker, so N workers let through up to N times these rates. The
+    # username bucket slows down guessing the password of one account from
+    # many addresses, at the price of letting anyone who knows an email keep
+    # its owner from logging in, at that rate.
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_IP_BURST: int = 20
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE: Annotated[float, Field(gt=0)] = 10.0
+    LOGIN_RATE_LIMIT_USERNAME_BURST: int = 5
+    LOGIN_RATE_LIMIT_USERNAME_PER_MINUTE: Annotated[float, Field(gt=0)] = 2.0
+    # Token buckets of sign-up attempts per client IP, each of which may cost a
+    # password hash, in the memory of each worker as well
+    SIGNUP_RATE_LIMIT_ENABLED: bool = True
+    SIGNUP_RATE_LIMIT_IP_BURST: int = 5
+    SIGNUP_RATE_LIMIT_IP_PER_MINUTE: Annotated[float, Field(gt=0)] = 2.0
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+    # Reverse proxies in front of the app, by address or network. Requests from
+    # them are limited by the client address they add to X-Forwarded-For, not
+    # by their own, which every client behind them would share
+    TRUSTED_PROXIES: list[IPvAnyNetwork] = []
+
+    # bcrypt cost of new hashes, pick it with `python -m
+    # fastapi_react_example_backend.calibrate_bcrypt`. Hashes of another cost
+    # are upgraded on the next successful login.
+    PASSWORD_BCRYPT_ROUNDS: Annotated[int, Field(ge=4, le=31)] = 12
+    PASSWORD_HASH_WORKERS: int | None = None  # None means one per CPU core
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 10.0
+
+    # Bloom filter of registered emails, past capacity false positives grow
+    EMAIL_FILTER_CAPACITY: int = 1_000_000
+    EMAIL_FILTER_ERROR_RATE: Annotated[float, Field(gt=0, lt=1)] = 0.01
+
+    USER_EXPORT_BATCH_SIZE: int = 1000  # rows fetched and sent at a time
+    USER_IMPORT_BATCH_SIZE: int = 500
+    USER_IMPORT_MAX_ISSUES: int = 100
+    # Concurrent hashes of an import, None means half the hashing workers
+    USER_IMPORT_HASH_CONCURRENCY: int | None = None
+
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10_000  # 0 disables the cache
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
 
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5432
     POSTGRES_USER: str = "postgres"
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "fastapi_backend"
+    # Async DSNs of read replicas, plain reads are balanced across them
+    POSTGRES_REPLICA_URIS: list[PostgresDsn] = []
+
+    DB_POOL_SIZE: int = 5
+    DB_POOL_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = -1  # -1 never recycles connections
+    DB_POOL_PRE_PING: bool = True
+    # Periodic liveness check, an alternative to per-checkout pre-pings
+    DB_POOL_LIVENESS_INTERVAL_SECONDS: float = 0.0  # 0 disables the check
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements
+
+    @model_validator(mode="after")
+    def _check_principal_cache_ttl(self) -> Self:
+        if self.PRINCIPAL_CACHE_TTL_SECONDS >= self.ACCESS_TOKEN_EXPIRE_MINUTES * 60:
+            raise ValueError(
+                "PRINCIPAL_CACHE_TTL_SECONDS must be shorter than "
+                "ACCESS_TOKEN_EXPIRE_MINUTES"
+            )
+        return self
 
     def _build_postgres_uri(self, driver: Literal["asyncpg", "psycopg"]) -> PostgresDsn:
         return PostgresDsn.build(
@@ -1,16 +1,182 @@
 from __future__ import annotations
 
+import atexit
+import json
 import logging
+import queue
 
 from logging.config import dictConfig
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import Literal
+from typing import TypedDict
 
+import pydantic_core
 import structlog
 
 from fastapi_react_example_backend.core.config import settings
 
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+type JSONSerializer = Literal["json", "pydantic_core", "orjson"]
+type OverflowPolicy = Literal["block", "drop_oldest", "drop"]
+
+
+class LogQueueStats(TypedDict):
+    size: int
+    max_size: int
+    dropped: int
+
+
+class BoundedQueueHandler(QueueHandler):
+    """Queue handler with a bounded buffer and a policy for when it is full.
+
+    `block` waits for room, `drop_oldest` evicts the oldest queued record and
+    `drop` discards the new one. Dropped records are counted in `dropped`.
+
+    Records are queued as they are, so rendering them is left to the handlers
+    of the listener thread, and stdlib records only interpolate their
+    arguments there. structlog has already merged the context variables of
+    its own records, those of stdlib records are captured here, on the
+    calling thread, for `merge_queued_contextvars` to add them.
+    """
+
+    def __init__(
+        self, log_queue: queue.Queue[Any], overflow_policy: OverflowPolicy = "drop"
+    ) -> None:
+        super().__init__(log_queue)
+        self.log_queue = log_queue
+        self.overflow_policy = overflow_policy
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # structlog records carry their event dict as the message
+        if not isinstance(record.msg, dict):
+            record.queued_contextvars = structlog.contextvars.get_contextvars()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        log_queue = self.log_queue
+        if self.overflow_policy == "block":
+            log_queue.put(record)
+            return
+
+        while True:
+            try:
+                log_queue.put_nowait(record)
+            except queue.Full:
+                pass
+            else:
+                return
+
+            if self.overflow_policy == "drop":
+                self.dropped += 1
+                return
+            try:
+                log_queue.get_nowait()
+            except queue.Empty:
+                continue  # the listener made room in the meantime
+            self.dropped += 1
+
+    def stats(self) -> LogQueueStats:
+        return LogQueueStats(
+            size=self.log_queue.qsize(),
+            max_size=self.log_queue.maxsize,
+            dropped=self.dropped,
+        )
+
+
+class BoundedQueueListener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full, wait for the listener to make room
+        self.queue.put(self._sentinel)  # type: ignore[attr-defined]
+
+
+def merge_queued_contextvars(
+    logger: Any, method_name: str, event_dict: structlog.types.EventDict
+) -> structlog.types.EventDict:
+    """Add the context variables `BoundedQueueHandler` captured for a record."""
+    record = event_dict.get("_record")
+    for key, value in getattr(record, "queued_contextvars", {}).items():
+        event_dict.setdefault(key, value)
+    return event_dict
+
+
+_queue_handler: BoundedQueueHandler | None = None
+_queue_listener: BoundedQueueListener | None = None
+_stop_registered_at_exit = False
+
+
+def _start_log_queue(root_logger: logging.Logger) -> None:
+    global _queue_handler, _queue_listener
+
+    log_queue: queue.Queue[Any] = queue.Queue(maxsize=settings.LOG_QUEUE_MAX_SIZE)
+    _queue_handler = BoundedQueueHandler(
+        log_queue, overflow_policy=settings.LOG_QUEUE_OVERFLOW_POLICY
+    )
+    _queue_listener = BoundedQueueListener(
+        log_queue, *root_logger.handlers, respect_handler_level=True
+    )
+    root_logger.handlers = [_queue_handler]
+    _queue_listener.start()
+
+
+def stop_logging() -> None:
+    """Write out every queued log record and stop the writer thread.
+
+    The listener handlers are put back on the root logger, so records logged
+    afterwards are still written, synchronously.
+    """
+    global _queue_handler, _queue_listener
+
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        logging.getLogger().handlers = list(_queue_listener.handlers)
+    _queue_handler = None
+    _queue_listener = None
+
+
+def get_log_queue_stats() -> LogQueueStats | None:
+    if _queue_handler is None:
+        return None
+    return _queue_handler.stats()
+
+
+def get_json_serializer(name: JSONSerializer) -> Callable[..., str]:
+    """Return a `json.dumps` compatible serializer for the JSON renderer.
+
+    `pydantic_core` ships with pydantic and `orjson` with the `fast-json`
+    extra, both are several times faster than the standard library.
+    """
+    if name == "pydantic_core":
+
+        def dumps_pydantic_core(obj: Any, **kw: Any) -> str:
+            return pydantic_core.to_json(obj, fallback=kw.get("default")).decode()
+
+        return dumps_pydantic_core
+
+    if name == "orjson":
+        import orjson
+
+        def dumps_orjson(obj: Any, **kw: Any) -> str:
+            data: bytes = orjson.dumps(obj, default=kw.get("default"))
+            return data.decode()
+
+        return dumps_orjson
+
+    return json.dumps
+
+
 def setup_logging() -> None:
+    global _stop_registered_at_exit
+
+    stop_logging()
+
     shared_processors: list[structlog.types.Processor] = [
         structlog.contextvars.merge_contextvars,
         structlog.stdlib.add_log_level,
@@ -34,7 +200,9 @@ def setup_logging() -> None:
             structlog.processors.format_exc_info,
             structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ]
-        renderer = structlog.processors.JSONRenderer()
+        renderer = structlog.processors.JSONRenderer(
+            serializer=get_json_serializer(settings.LOG_JSON_SERIALIZER)
+        )
         formatter = "json"
 
     logging_config: dict[str, Any] = {
@@ -48,7 +216,8 @@ def setup_logging() -> None:
             "json": {
                 "()": structlog.stdlib.ProcessorFormatter,
                 "processor": renderer,
-                "foreign_pre_chain": processors,
+                # Records from stdlib loggers are not wrapped for the formatter
+                "foreign_pre_chain": [merge_queued_contextvars, *processors[:-1]],
             },
         },
         "handlers": {
@@ -78,6 +247,12 @@ def setup_logging() -> None:
     }
 
     dictConfig(logging_config)
+    if settings.LOG_QUEUE_ENABLED:
+        _start_log_queue(logging.getLogger())
+        if not _stop_registered_at_exit:
+            atexit.register(stop_logging)
+            _stop_registered_at_exit = True
+
     structlog.configure(
         processors=processors,
         wrapper_class=structlog.stdlib.BoundLogger,
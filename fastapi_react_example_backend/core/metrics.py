@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import bisect
+import json
+import math
+import os
+
+from typing import TYPE_CHECKING
+from typing import TypedDict
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Iterable
+    from pathlib import Path
+
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class HistogramSnapshot(TypedDict):
+    buckets: list[int]
+    sum: float
+    count: int
+
+
+class MetricsSnapshot(TypedDict):
+    pid: int
+    counters: dict[str, dict[str, float]]
+    gauges: dict[str, dict[str, float]]
+    histograms: dict[str, dict[str, HistogramSnapshot]]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(**labels: str) -> str:
+    """Render a label set once, the result is used as the series key."""
+    return ",".join(
+        f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()
+    )
+
+
+class MetricsRegistry:
+    """Per-process store of counters, gauges and latency histograms.
+
+    Metrics are keyed by name and by their rendered label set. Updates only
+    ever happen on the event loop thread, so plain dicts and ints are enough
+    and recording a request costs a few dictionary operations. Collectors
+    registered with `add_collector` refresh values owned by other components
+    (caches, pools...) right before each snapshot.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counters: dict[str, dict[str, float]] = {}
+        self.gauges: dict[str, dict[str, float]] = {}
+        self.histograms: dict[str, dict[str, HistogramSnapshot]] = {}
+        self._collectors: list[Callable[[MetricsRegistry], None]] = []
+
+    def inc(self, name: str, labels: str = "", value: float = 1) -> None:
+        series = self.counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def set_counter(self, name: str, labels: str, value: float) -> None:
+        self.counters.setdefault(name, {})[labels] = value
+
+    def set_gauge(self, name: str, labels: str, value: float) -> None:
+        self.gauges.setdefault(name, {})[labels] = value
+
+    def add_gauge(self, name: str, labels: str, value: float) -> None:
+        series = self.gauges.setdefault(name, {})
+        series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, labels: str, value: float) -> None:
+        series = self.histograms.setdefault(name, {})
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = HistogramSnapshot(
+                buckets=[0] * (len(self.buckets) + 1), sum=0.0, count=0
+            )
+
+        histogram["buckets"][bisect.bisect_left(self.buckets, value)] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+    def add_collector(self, collector: Callable[[MetricsRegistry], None]) -> None:
+        self._collectors.append(collector)
+
+    def snapshot(self) -> MetricsSnapshot:
+        for collector in self._collectors:
+            collector(self)
+
+        return MetricsSnapshot(
+            pid=os.getpid(),
+            counters={name: dict(series) for name, series in self.counters.items()},
+            gauges={name: dict(series) for name, series in self.gauges.items()},
+            histograms={
+                name: {
+                    labels: HistogramSnapshot(
+                        buckets=list(histogram["buckets"]),
+                        sum=histogram["sum"],
+                        count=histogram["count"],
+                    )
+                    for labels, histogram in series.items()
+                }
+                for name, series in self.histograms.items()
+            },
+        )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MultiprocessStore:
+    """Shares snapshots between the workers of one server through a directory.
+
+    Every worker writes its own snapshot to `<directory>/metrics-<pid>.json`,
+    and a scrape served by any worker merges all of them. Counters and
+    histograms of workers that have exited are kept so totals never go
+    backwards, while their gauges are dropped. Empty the directory whenever
+    the server is (re)started.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def write(self, snapshot: MetricsSnapshot) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"metrics-{snapshot['pid']}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(snapshot))
+        tmp_path.replace(path)
+
+    def read_all(self) -> list[MetricsSnapshot]:
+        snapshots = []
+        for path in sorted(self.directory.glob("metrics-*.json")):
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # being replaced or removed right now
+        return snapshots
+
+
+def merge_snapshots(snapshots: Iterable[MetricsSnapshot]) -> MetricsSnapshot:
+    merged = MetricsSnapshot(pid=os.getpid(), counters={}, gauges={}, histograms={})
+
+    for snapshot in snapshots:
+        for name, series in snapshot["counters"].items():
+            merged_series = merged["counters"].setdefault(name, {})
+            for labels, value in series.items():
+                merged_series[labels] = merged_series.get(labels, 0) + value
+
+        if snapshot["pid"] == os.getpid() or _pid_alive(snapshot["pid"]):
+            for name, series in snapshot["gauges"].items():
+                merged_series = merged["gauges"].setdefault(name, {})
+                for labels, value in series.items():
+                    merged_series[labels] = merged_series.get(labels, 0) + value
+
+        for name, histograms in snapshot["histograms"].items():
+            merged_histograms = merged["histograms"].setdefault(name, {})
+            for labels, histogram in histograms.items():
+                target = merged_histograms.get(labels)
+                if target is None:
+                    merged_histograms[labels] = HistogramSnapshot(
+                        buckets=list(histogram["buckets"]),
+                        sum=histogram["sum"],
+                        count=histogram["count"],
+                    )
+                    continue
+                for i, bucket_count in enumerate(histogram["buckets"]):
+                    target["buckets"][i] += bucket_count
+                target["sum"] += histogram["sum"]
+                target["count"] += histogram["count"]
+
+    return merged
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _series(name: str, labels: str) -> str:
+    return f"{name}{{{labels}}}" if labels else name
+
+
+def _with_label(labels: str, extra: str) -> str:
+    return f"{labels},{extra}" if labels else extra
+
+
+def render_prometheus(
+    snapshot: MetricsSnapshot, buckets: tuple[float, ...] = LATENCY_BUCKETS
+) -> str:
+    """Render a snapshot in the Prometheus text exposition format."""
+    lines: list[str] = []
+
+    for name, series in sorted(snapshot["counters"].items()):
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(series.items()):
+            lines.append(f"{_series(name, labels)} {_format_value(value)}")
+
+    for name, series in sorted(snapshot["gauges"].items()):
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in sorted(series.items()):
+            lines.append(f"{_series(name, labels)} {_format_value(value)}")
+
+    for name, histograms in sorted(snapshot["histograms"].items()):
+        lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for upper_bound, bucket_count in zip(
+                (*buckets, math.inf), histogram["buckets"], strict=True
+            ):
+                cumulative += bucket_count
+                le = _with_label(labels, f'le="{_format_value(upper_bound)}"')
+                lines.append(f"{name}_bucket{{{le}}} {cumulative}")
+            total = _format_value(histogram["sum"])
+            lines.append(f"{_series(f'{name}_sum', labels)} {total}")
+            lines.append(f"{_series(f'{name}_count', labels)} {histogram['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
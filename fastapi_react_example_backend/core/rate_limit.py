@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import math
+import time
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from typing import Protocol
+
+from fastapi_react_example_backend.core.config import settings
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+
+class RateLimitBackend(Protocol):
+    """Storage of token buckets, shared by every limiter using it.
+
+    The in-memory backend only limits a single process; a backend on a
+    shared store applies the limits across the whole fleet.
+    """
+
+    async def consume(self, key: str, *, rate: float, burst: int) -> float:
+        """Take one token from the bucket of `key`.
+
+        Returns 0 if there was one, otherwise the seconds until there is.
+        """
+        ...
+
+    async def peek(self, key: str, *, rate: float, burst: int) -> float:
+        """Like `consume`, without taking the token."""
+        ...
+
+    async def clear(self) -> None: ...
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets in a bounded LRU mapping, for one process.
+
+    A bucket left alone long enough to refill completely is the same as a
+    missing one, so idle buckets are dropped as they are found at the cold
+    end of the LRU order. When `max_keys` is reached anyway, the least
+    recently used bucket is dropped, which at worst forgives a client.
+    It is used from the event loop thread only, so it takes no locks.
+    """
+
+    def __init__(
+        self, *, max_keys: int, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (tokens left, last update, time the bucket is full again)
+        self._buckets: OrderedDict[str, tuple[float, float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            oldest_key = next(iter(self._buckets))
+            _, _, full_at = self._buckets[oldest_key]
+            if full_at > now and len(self._buckets) < self.max_keys:
+                break
+            del self._buckets[oldest_key]
+
+    @staticmethod
+    def _refill(
+        bucket: tuple[float, float, float] | None, now: float, rate: float, burst: int
+    ) -> float:
+        if bucket is None:
+            return float(burst)
+        tokens, updated_at, _ = bucket
+        return min(burst, tokens + (now - updated_at) * rate)
+
+    async def consume(self, key: str, *, rate: float, burst: int) -> float:
+        now = self._clock()
+        bucket = self._buckets.pop(key, None)
+        self._evict(now)
+        tokens = self._refill(bucket, now, rate, burst)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+        return retry_after
+
+    async def peek(self, key: str, *, rate: float, burst: int) -> float:
+        tokens = self._refill(self._buckets.get(key), self._clock(), rate, burst)
+        return 0.0 if tokens >= 1 else (1 - tokens) / rate
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+
+
+class RateLimiter:
+    """Allows bursts of `burst` hits per key, refilled at `per_minute`."""
+
+    def __init__(
+        self, name: str, *, per_minute: float, burst: int, backend: RateLimitBackend
+    ) -> None:
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.backend = backend
+
+    async def hit(self, key: str) -> int:
+        """Count a hit for `key`, returning 0 or the whole seconds to wait."""
+        retry_after = await self.backend.consume(
+            f"{self.name}:{key}", rate=self.rate, burst=self.burst
+        )
+        return math.ceil(retry_after)
+
+    async def check(self, key: str) -> int:
+        """Like `hit`, without counting one, for limits on outcomes."""
+        retry_after = await self.backend.peek(
+            f"{self.name}:{key}", rate=self.rate, burst=self.burst
+        )
+        return math.ceil(retry_after)
+
+
+rate_limit_backend = InMemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+login_ip_limiter = RateLimiter(
+    "login-ip",
+    per_minute=settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE,
+    burst=settings.LOGIN_RATE_LIMIT_IP_BURST,
+    backend=rate_limit_backend,
+)
+login_username_limiter = RateLimiter(
+    "login-username",
+    per_minute=settings.LOGIN_RATE_LIMIT_USERNAME_PER_MINUTE,
+    burst=settings.LOGIN_RATE_LIMIT_USERNAME_BURST,
+    backend=rate_limit_backend,
+)
+signup_ip_limiter = RateLimiter(
+    "signup-ip",
+    per_minute=settings.SIGNUP_RATE_LIMIT_IP_PER_MINUTE,
+    burst=settings.SIGNUP_RATE_LIMIT_IP_BURST,
+    backend=rate_limit_backend,
+)
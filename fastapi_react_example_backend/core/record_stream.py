@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Literal
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from collections.abc import AsyncIterable
+    from collections.abc import Mapping
+    from collections.abc import Sequence
+
+
+type RecordFormat = Literal["ndjson", "csv"]
+
+RECORD_FORMAT_MEDIA_TYPES: dict[RecordFormat, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Longest accepted line, it bounds the memory used to split an upload
+MAX_LINE_BYTES = 64 * 1024
+
+
+class RecordStreamError(ValueError):
+    """The upload cannot be split into records, so it is rejected as a whole."""
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedRecord:
+    """One record of an upload, or the reason it could not be parsed."""
+
+    line: int
+    data: dict[str, Any] | None = None
+    error: str | None = None
+
+
+async def iter_lines(
+    chunks: AsyncIterable[bytes], *, max_line_bytes: int = MAX_LINE_BYTES
+) -> AsyncGenerator[bytes]:
+    """Split a byte stream on newlines, holding at most one line in memory."""
+    too_long = f"Lines must be at most {max_line_bytes} bytes long"
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        if b"\n" in chunk:
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if len(line) > max_line_bytes:
+                    raise RecordStreamError(too_long)
+                yield line.removesuffix(b"\r")
+        if len(buffer) > max_line_bytes:
+            raise RecordStreamError(too_long)
+
+    if buffer:
+        yield buffer.removesuffix(b"\r")
+
+
+def _decode(raw_line: bytes, line: int) -> str:
+    # Strip the byte order mark spreadsheets like to put in front of exports
+    return raw_line.decode("utf-8-sig" if line == 1 else "utf-8")
+
+
+async def iter_records(
+    chunks: AsyncIterable[bytes], record_format: RecordFormat
+) -> AsyncGenerator[ParsedRecord]:
+    """Parse an NDJSON or CSV upload record by record.
+
+    Blank lines are skipped. A CSV upload starts with a header row naming the
+    fields, and each of its records must fit on a single line. Records that
+    cannot be parsed are yielded with an `error` instead of failing the rest
+    of the upload.
+    """
+    header: list[str] | None = None
+    line = 0
+    async for raw_line in iter_lines(chunks):
+        line += 1
+        if not raw_line.strip():
+            continue
+
+        try:
+            text = _decode(raw_line, line)
+        except UnicodeDecodeError:
+            yield ParsedRecord(line, error="Invalid UTF-8")
+            continue
+
+        if record_format == "ndjson":
+            try:
+                data = json.loads(text)
+            except ValueError:
+                yield ParsedRecord(line, error="Invalid JSON")
+                continue
+            if not isinstance(data, dict):
+                yield ParsedRecord(line, error="Expected a JSON object")
+                continue
+            yield ParsedRecord(line, data=data)
+            continue
+
+        row = next(csv.reader([text]))
+        if header is None:
+            header = row
+            continue
+        if len(row) != len(header):
+            yield ParsedRecord(line, error=f"Expected {len(header)} fields")
+            continue
+        # Empty cells stand for missing values
+        yield ParsedRecord(
+            line,
+            data={
+                name: value for name, value in zip(header, row, strict=True) if value
+            },
+        )
+
+
+async def encode_records(
+    batches: AsyncIterable[Sequence[Mapping[Any, Any]]],
+    fields: Sequence[str],
+    record_format: RecordFormat,
+) -> AsyncGenerator[bytes]:
+    """Serialize batches of records to NDJSON or CSV, one chunk per batch.
+
+    CSV output starts with a header row and leaves missing values empty, so
+    it can be read back by `iter_records`.
+    """
+    if record_format == "ndjson":
+        async for batch in batches:
+            yield "".join(
+                json.dumps({field: record[field] for field in fields}, default=str)
+                + "\n"
+                for record in batch
+            ).encode()
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(fields)
+    async for batch in batches:
+        writer.writerows([record[field] for field in fields] for record in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # header of an empty export
@@ -1,17 +1,129 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import os
+import statistics
+import threading
+import time
+import uuid
+
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC
 from datetime import datetime
 from datetime import timedelta
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import TypeVar
 
-from jose import jwt
+from jose import JWTError
 from passlib.context import CryptContext
+from pydantic import ValidationError
 
+from fastapi_react_example_backend.core.cache import TTLCache
 from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.token_keys import load_key_ring
+from fastapi_react_example_backend.models.token import TokenPayload
+
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from fastapi_react_example_backend.models.user import User
+
+
+T = TypeVar("T")
+
+# Bump whenever the set of embedded user claims changes shape
+ACCESS_TOKEN_CLAIMS_VERSION = 1
+
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+
+# Any other cost counts as outdated, so changing the setting both raises and
+# lowers the cost of every hash as users log in
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+
+class InvalidAccessTokenError(Exception):
+    """The access token is malformed, expired or not signed by us."""
+
+
+class PasswordHashingBusyError(Exception):
+    """The password hashing pool is saturated or did not answer in time."""
+
 
+class PasswordHashingPool:
+    """Runs bcrypt work in worker threads so it never blocks the event loop.
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    bcrypt releases the GIL while hashing, so a thread pool scales with cores
+    without the pickling and start-up cost of a process pool. At most
+    `max_pending` calls may be queued or running; further calls fail fast with
+    `PasswordHashingBusyError` instead of piling up behind a login storm.
+    """
+
+    def __init__(
+        self, *, max_workers: int | None, max_pending: int, timeout: float
+    ) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="password-hashing",
+                    )
+        return self._executor
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> asyncio.Future[T]:
+        """Queue `fn`, failing fast when the pool is saturated.
+
+        Once started, the work runs to completion in its thread whatever
+        happens to the returned future, and holds its slot until then.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusyError("Password hashing queue is full")
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return asyncio.wrap_future(future)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        future = self.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except TimeoutError as e:
+            raise PasswordHashingBusyError("Password hashing timed out") from e
+
+    def shutdown(self, *, wait: bool = False) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+password_hashing_pool = PasswordHashingPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -22,16 +134,138 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether the hash uses another scheme or cost than the configured one."""
+    return pwd_context.needs_update(hashed_password)
+
+
+def measure_bcrypt_verify(rounds: int, *, samples: int = 5) -> float:
+    """Median seconds taken to verify a password hashed with `rounds`."""
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    hashed_password = handler.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.verify("calibration-password", hashed_password)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt_rounds(
+    target_seconds: float,
+    *,
+    samples: int = 5,
+    measure: Callable[..., float] = measure_bcrypt_verify,
+) -> tuple[int, dict[int, float]]:
+    """Find the highest bcrypt cost verifying within `target_seconds`.
+
+    Each extra round doubles the work, so costs are measured from the lowest
+    one up until the target is exceeded. Returns the chosen cost, which is
+    never below bcrypt's minimum of 4, along with every measurement.
+    """
+    timings: dict[int, float] = {}
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds <= BCRYPT_MAX_ROUNDS:
+        timings[rounds] = measure(rounds, samples=samples)
+        if timings[rounds] > target_seconds:
+            break
+        rounds += 1
+
+    within_target = [r for r, elapsed in timings.items() if elapsed <= target_seconds]
+    return max(within_target, default=BCRYPT_MIN_ROUNDS), timings
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hashing_pool.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hashing_pool.run(get_password_hash, password)
+
+
+def hash_refresh_token(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+access_token_keys = load_key_ring()
+
+
 def create_access_token(
-    subject: str | Any, expires_delta: timedelta | None = None
+    subject: str | Any,
+    expires_delta: timedelta | None = None,
+    claims: dict[str, Any] | None = None,
 ) -> str:
     if not expires_delta:
         expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
     expire = datetime.now(UTC) + expires_delta
-    to_encode = {"sub": str(subject), "exp": expire}
-    encoded_jwt = jwt.encode(
-        to_encode, settings.SECRET_KEY, algorithm=settings.ACCESS_TOKEN_ALGORITHM
+    to_encode = {**(claims or {}), "sub": str(subject), "exp": expire}
+    return access_token_keys.sign(to_encode)
+
+
+# Verified tokens keyed by a digest of the raw token, kept until they expire
+verified_token_cache: TTLCache[bytes, tuple[uuid.UUID, TokenPayload]] = TTLCache(
+    max_size=settings.ACCESS_TOKEN_CACHE_MAX_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+def verify_access_token(token: str) -> tuple[uuid.UUID, TokenPayload, float]:
+    """Fully verify `token`, returning its subject, payload and expiry time."""
+    try:
+        payload = access_token_keys.decode(token)
+        token_data = TokenPayload(**payload)
+
+    except (JWTError, ValidationError) as e:
+        raise InvalidAccessTokenError(str(e)) from e
+
+    if not token_data.sub:
+        raise InvalidAccessTokenError("Token has no subject")
+
+    try:
+        user_id = uuid.UUID(token_data.sub)
+    except ValueError as e:
+        raise InvalidAccessTokenError("Token subject is not a user id") from e
+
+    # jose checks exp when there is one, but a token without it never expires
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, bool) or not isinstance(expires_at, int | float):
+        raise InvalidAccessTokenError("Token has no expiry")
+
+    return user_id, token_data, float(expires_at)
+
+
+def decode_access_token(token: str) -> tuple[uuid.UUID, TokenPayload]:
+    """Memoized `verify_access_token` for tokens that are sent over and over.
+
+    Only successfully verified tokens are cached, and never past their `exp`,
+    so repeated requests skip signature checks and payload validation.
+    """
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = verified_token_cache.get(key)
+    if cached is not None:
+        return cached
+
+    user_id, token_data, expires_at = verify_access_token(token)
+    verified_token_cache.set(
+        key,
+        (user_id, token_data),
+        expires_at=time.monotonic() + (expires_at - time.time()),
     )
+    return user_id, token_data
+
+
+def create_user_access_token(user: User, expires_delta: timedelta | None = None) -> str:
+    claims = None
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS:
+        claims = {
+            "ver": ACCESS_TOKEN_CLAIMS_VERSION,
+            "adm": user.is_admin,
+            "email": user.email,
+            "name": user.full_name,
+            "uv": user.version,
+        }
 
-    return encoded_jwt
+    return create_access_token(user.id, expires_delta=expires_delta, claims=claims)
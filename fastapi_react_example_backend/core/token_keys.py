@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Any
+
+import structlog
+
+from jose import JWTError
+from jose import jwk
+from jose import jwt
+from jose.backends import ECKey
+
+from fastapi_react_example_backend.core.config import settings
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+
+logger = structlog.get_logger(__name__)
+
+# Key id of SECRET_KEY when no key ring is configured
+DEFAULT_KID = "default"
+
+# ECDSA algorithm of the keys on each curve
+EC_CURVE_ALGORITHMS = {"P-256": "ES256", "P-384": "ES384", "P-521": "ES512"}
+
+
+@dataclass(frozen=True, slots=True)
+class SigningKey:
+    kid: str
+    # Shared secret of HMAC algorithms, PEM encoded private key of ECDSA ones
+    secret: str
+    algorithm: str = "HS256"
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return not self.algorithm.startswith("HS")
+
+
+def parse_signing_key(kid: str, secret: str, hmac_algorithm: str) -> SigningKey:
+    """Build a key, taking its algorithm from the key material.
+
+    PEM encoded EC keys sign with the ECDSA algorithm of their curve, and any
+    other secret with `hmac_algorithm`.
+    """
+    if not secret.startswith("-----BEGIN"):
+        return SigningKey(kid=kid, secret=secret, algorithm=hmac_algorithm)
+
+    try:
+        curve = jwk.construct(secret, "ES256").to_dict()["crv"]
+    except Exception as e:  # each jose backend fails in its own way
+        raise ValueError(f"The key {kid!r} is not a PEM encoded EC key") from e
+    if curve not in EC_CURVE_ALGORITHMS:
+        raise ValueError(f"The key {kid!r} is on the unsupported curve {curve}")
+    return SigningKey(kid=kid, secret=secret, algorithm=EC_CURVE_ALGORITHMS[curve])
+
+
+class KeyRing:
+    """Keys that sign and verify access tokens, by key id (`kid`).
+
+    Tokens are signed with the signing key and stamped with its id, then
+    verified with whichever key their `kid` names, so every worker and node
+    sharing the ring accepts the tokens of the others. The public half of
+    ECDSA keys is published as a JWKS, letting other services verify tokens
+    without the secret or a call to this backend. Overlap keys to rotate them
+    without logging anyone out:
+
+    1. add the new key everywhere, still signing with the old one;
+    2. sign with the new key once every node has it, and every JWKS cache
+       has expired;
+    3. drop the old key once the last token it signed has expired.
+    """
+
+    def __init__(self, keys: Iterable[SigningKey], signing_kid: str | None) -> None:
+        self.keys = {key.kid: key for key in keys}
+        if not self.keys:
+            raise ValueError("The key ring has no keys")
+        if signing_kid is None:
+            if len(self.keys) > 1:
+                raise ValueError(
+                    "ACCESS_TOKEN_SIGNING_KID must name the signing key when "
+                    "there are several"
+                )
+            signing_kid = next(iter(self.keys))
+        if signing_kid not in self.keys:
+            raise ValueError(f"The signing key {signing_kid!r} is not in the ring")
+        self.signing_key = self.keys[signing_kid]
+
+        # Parsing a PEM key costs more than using it, so it is done once here
+        self._signer = jwk.construct(
+            self.signing_key.secret, self.signing_key.algorithm
+        )
+        self._verifiers = {
+            key.kid: jwk.construct(key.secret, key.algorithm)
+            for key in self.keys.values()
+        }
+        for kid, verifier in self._verifiers.items():
+            if self.keys[kid].is_asymmetric:
+                self._verifiers[kid] = verifier.public_key()
+
+    def get(self, kid: str | None) -> SigningKey | None:
+        # Tokens issued before key ids were stamped carry none
+        if kid is None:
+            return self.signing_key
+        return self.keys.get(kid)
+
+    def sign(self, claims: dict[str, Any]) -> str:
+        return jwt.encode(
+            claims,
+            self._signer,
+            algorithm=self.signing_key.algorithm,
+            headers={"kid": self.signing_key.kid},
+        )
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Verify `token` with the key its `kid` names and return its claims.
+
+        Only the algorithm of that key is accepted, so a token cannot pass an
+        ECDSA public key off as an HMAC secret. Raises `JWTError`.
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        # The header is not verified yet, so its kid may be any JSON value
+        if kid is not None and not isinstance(kid, str):
+            raise JWTError("The key id of the token is not a string")
+        key = self.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown signing key {kid!r}")
+        return jwt.decode(token, self._verifiers[key.kid], algorithms=[key.algorithm])
+
+    def jwks(self) -> dict[str, list[dict[str, Any]]]:
+        """The public keys of the ring as a JWK Set, HMAC secrets excluded."""
+        return {
+            "keys": [
+                {**self._verifiers[key.kid].to_dict(), "kid": key.kid, "use": "sig"}
+                for key in self.keys.values()
+                if key.is_asymmetric
+            ]
+        }
+
+
+def load_key_files(directory: Path) -> list[tuple[str, str]]:
+    """Read one key per file as (key id, secret), the id being its name.
+
+    That is the layout of a mounted secret volume, whose hidden entries are
+    skipped.
+    """
+    keys = []
+    for path in sorted(directory.iterdir()):
+        if path.name.startswith(".") or not path.is_file():
+            continue
+        secret = path.read_text().strip()
+        if not secret:
+            raise ValueError(f"The key file {path} is empty")
+        keys.append((path.name, secret))
+    return keys
+
+
+def load_key_ring() -> KeyRing:
+    secrets = list(settings.ACCESS_TOKEN_KEYS.items())
+    if settings.ACCESS_TOKEN_KEYS_DIR is not None:
+        secrets.extend(load_key_files(settings.ACCESS_TOKEN_KEYS_DIR))
+
+    if not secrets:
+        if (
+            "SECRET_KEY" not in settings.model_fields_set
+            and settings.ENVIRONMENT != "local"
+        ):
+            logger.warning(
+                "No access token keys are configured, tokens signed by this "
+                "process will not verify in any other"
+            )
+        secrets.append((DEFAULT_KID, settings.SECRET_KEY))
+
+    keys = [
+        parse_signing_key(kid, secret, settings.ACCESS_TOKEN_ALGORITHM)
+        for kid, secret in secrets
+    ]
+    # Without cryptography python-jose falls back to pure Python ECDSA, whose
+    # verify blocks the event loop for milliseconds on every uncached token
+    if ECKey.__name__ != "CryptographyECKey" and any(key.is_asymmetric for key in keys):
+        logger.warning(
+            "ECDSA access token keys are configured without the cryptography "
+            "package, install python-jose[cryptography]"
+        )
+    return KeyRing(keys, settings.ACCESS_TOKEN_SIGNING_KID)
@@ -6,39 +6,119 @@ from datetime import UTC
 from datetime import datetime
 from datetime import timedelta
 from typing import TYPE_CHECKING
+from typing import Any
+from typing import cast
 
+from sqlalchemy import delete
+from sqlmodel import col
 from sqlmodel import select
 
 from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.security import hash_refresh_token
 from fastapi_react_example_backend.models.token import RefreshToken
 
 
 if TYPE_CHECKING:
     import uuid
 
+    from sqlalchemy import CursorResult
     from sqlalchemy.ext.asyncio import AsyncSession
 
 
-async def create_refresh_token(
-    *, session: AsyncSession, user_id: uuid.UUID
-) -> RefreshToken:
+def _build_refresh_token(user_id: uuid.UUID) -> tuple[RefreshToken, str]:
     expires_delta = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    token = secrets.token_urlsafe(64)
 
     db_refresh_token = RefreshToken(
-        token=secrets.token_urlsafe(64),
+        token_hash=hash_refresh_token(token),
         expires_at=datetime.now(UTC) + expires_delta,
         user_id=user_id,
     )
+    return db_refresh_token, token
+
+
+async def create_refresh_token(
+    *, session: AsyncSession, user_id: uuid.UUID
+) -> tuple[RefreshToken, str]:
+    """Store a new refresh token, returning the row and the raw token.
+
+    Only the token digest is persisted, so the raw value returned here is the
+    one chance to hand it to the client.
+    """
+    db_refresh_token, token = _build_refresh_token(user_id)
 
     session.add(db_refresh_token)
     await session.commit()
-    await session.refresh(db_refresh_token)
-    return db_refresh_token
+    return db_refresh_token, token
 
 
 async def get_refresh_token(
     *, session: AsyncSession, token: str
 ) -> RefreshToken | None:
-    statement = select(RefreshToken).where(RefreshToken.token == token)
+    statement = select(RefreshToken).where(
+        RefreshToken.token_hash == hash_refresh_token(token)
+    )
     result = await session.execute(statement)
     return result.scalars().one_or_none()
+
+
+async def rotate_refresh_token(
+    *, session: AsyncSession, token: str
+) -> tuple[RefreshToken, str] | None:
+    """Consume `token` and issue its replacement in a single transaction.
+
+    Returns None when the token is unknown, expired or was consumed first by
+    a concurrent request. Where the dialect supports `DELETE ... RETURNING`,
+    consuming the token is a single statement and a concurrent second use
+    simply deletes no rows.
+    """
+    now = datetime.now(UTC)
+    user_id: uuid.UUID | None = None
+
+    if session.get_bind().dialect.delete_returning:
+        consume_statement = (
+            delete(RefreshToken)
+            .where(
+                col(RefreshToken.token_hash) == hash_refresh_token(token),
+                col(RefreshToken.expires_at) > now,
+            )
+            .returning(col(RefreshToken.user_id))
+        )
+        consumed = await session.execute(consume_statement)
+        user_id = consumed.scalar_one_or_none()
+    else:
+        old_refresh_token = await get_refresh_token(session=session, token=token)
+        if old_refresh_token and old_refresh_token.expires_at > now:
+            delete_statement = delete(RefreshToken).where(
+                col(RefreshToken.id) == old_refresh_token.id
+            )
+            deleted = cast("CursorResult[Any]", await session.execute(delete_statement))
+            if deleted.rowcount == 1:
+                user_id = old_refresh_token.user_id
+
+    if user_id is None:
+        return None
+
+    db_refresh_token, new_token = _build_refresh_token(user_id)
+    session.add(db_refresh_token)
+    await session.commit()
+    return db_refresh_token, new_token
+
+
+async def delete_expired_refresh_tokens(
+    *, session: AsyncSession, batch_size: int
+) -> int:
+    """Delete up to `batch_size` expired tokens and commit, returning the count."""
+    expired_ids = (
+        select(RefreshToken.id)
+        .where(col(RefreshToken.expires_at) <= datetime.now(UTC))
+        .limit(batch_size)
+    )
+    statement = (
+        delete(RefreshToken)
+        .where(col(RefreshToken.id).in_(expired_ids))
+        .execution_options(synchronize_session=False)
+    )
+    deleted = cast("CursorResult[Any]", await session.execute(statement))
+    await session.commit()
+    return deleted.rowcount
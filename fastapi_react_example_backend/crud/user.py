@@ -1,18 +1,111 @@
 from __future__ import annotations
 
+import asyncio
+import uuid
+
 from typing import TYPE_CHECKING
+from typing import Any
+from typing import cast
 
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import text
+from sqlalchemy import tuple_
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import col
 from sqlmodel import select
 
+from fastapi_react_example_backend.core.bloom import BloomFilter
+from fastapi_react_example_backend.core.cache import TTLCache
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.metrics import format_labels
+from fastapi_react_example_backend.core.metrics import registry
+from fastapi_react_example_backend.core.security import PasswordHashingBusyError
 from fastapi_react_example_backend.core.security import get_password_hash
-from fastapi_react_example_backend.core.security import verify_password
+from fastapi_react_example_backend.core.security import get_password_hash_async
+from fastapi_react_example_backend.core.security import password_hashing_pool
+from fastapi_react_example_backend.core.security import verify_password_async
 from fastapi_react_example_backend.models.user import User
 from fastapi_react_example_backend.models.user import UserCreate
+from fastapi_react_example_backend.models.user import UserImportIssue
+from fastapi_react_example_backend.models.user import UserImportReport
+from fastapi_react_example_backend.models.user import UserPublic
+from fastapi_react_example_backend.models.user import UserRegister
 
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from collections.abc import AsyncIterable
+    from collections.abc import Sequence
+
+    from sqlalchemy import CursorResult
+    from sqlalchemy import RowMapping
     from sqlalchemy.ext.asyncio import AsyncSession
 
+    from fastapi_react_example_backend.core.record_stream import ParsedRecord
+    from fastapi_react_example_backend.models.user import UserUpdate
+
+
+# Detached snapshots of recently authenticated users, keyed by user id. Treat
+# them as read-only: load the row through the session before mutating it.
+principal_cache: TTLCache[uuid.UUID, User] = TTLCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+# Every registered email, lowercased, so sign-ups with a new email skip the
+# index lookup. It only knows the emails this process has seen: until it is
+# loaded, and for users created by other workers, the unique index still
+# has the final say.
+registered_emails = BloomFilter(
+    capacity=settings.EMAIL_FILTER_CAPACITY, error_rate=settings.EMAIL_FILTER_ERROR_RATE
+)
+registered_emails_loaded = asyncio.Event()
+
+# asyncpg binds at most 32767 parameters in a statement
+MAX_BIND_PARAMETERS = 32767
+
+# Waits of an import for room in the hashing pool, doubling up to the maximum
+IMPORT_HASH_BACKOFF_SECONDS = 0.05
+IMPORT_HASH_MAX_BACKOFF_SECONDS = 1.0
+
+
+def invalidate_cached_user(user_id: uuid.UUID) -> None:
+    principal_cache.pop(user_id)
+
+
+def remember_email(email: str) -> None:
+    registered_emails.add(email.lower())
+
+
+def may_be_registered(email: str) -> bool:
+    if not registered_emails_loaded.is_set():
+        return True
+    return email.lower() in registered_emails
+
+
+async def load_registered_emails(*, session: AsyncSession, batch_size: int) -> int:
+    """Fill `registered_emails` from the user table, returning the count.
+
+    Emails of users created meanwhile are added as usual, so none is missed.
+    """
+    registered_emails_loaded.clear()
+    registered_emails.clear()
+
+    statement = select(User.email).execution_options(yield_per=batch_size)
+    result = await session.stream(statement)
+    async for partition in result.scalars().partitions():
+        for email in partition:
+            remember_email(email)
+
+    registered_emails_loaded.set()
+    return len(registered_emails)
+
 
 async def authenticate(
     *, session: AsyncSession, email: str, password: str
@@ -21,26 +114,123 @@ async def authenticate(
     if not db_user:
         return None
 
-    if not verify_password(password, db_user.hashed_password):
+    if not await verify_password_async(password, db_user.hashed_password):
         return None
 
     return db_user
 
 
+async def rehash_password(
+    *, session: AsyncSession, user_id: uuid.UUID, hashed_password: str, password: str
+) -> bool:
+    """Store a hash of `password` at the configured cost.
+
+    The row is only updated if it still holds `hashed_password`, so a password
+    changed meanwhile is never overwritten. Returns whether it was updated.
+    """
+    new_hashed_password = await get_password_hash_async(password)
+    statement = (
+        update(User)
+        .where(
+            col(User.id) == user_id,
+            col(User.hashed_password) == hashed_password,
+        )
+        .values(hashed_password=new_hashed_password)
+    )
+    updated = cast("CursorResult[Any]", await session.execute(statement))
+    await session.commit()
+    invalidate_cached_user(user_id)
+    return updated.rowcount == 1
+
+
 async def create_user(
     *, session: AsyncSession, user_create: UserCreate, is_admin: bool = False
 ) -> User:
+    hashed_password = await get_password_hash_async(user_create.password)
     db_user = User.model_validate(
         user_create,
         update={
             "is_admin": is_admin,
-            "hashed_password": get_password_hash(user_create.password),
+            "hashed_password": hashed_password,
         },
     )
 
     session.add(db_user)
     await session.commit()
     await session.refresh(db_user)
+    invalidate_cached_user(db_user.id)
+    remember_email(db_user.email)
+    return db_user
+
+
+async def create_user_if_missing(
+    *, session: AsyncSession, user_create: UserCreate, is_admin: bool = False
+) -> bool:
+    """Create the user unless its email is taken, returning whether it was.
+
+    Safe to run from many processes at once: the password is only hashed
+    when no user was found, and a user created meanwhile makes the insert
+    a no-op rather than a unique index violation.
+    """
+    if await get_user_by_email(session=session, email=user_create.email):
+        return False
+
+    hashed_password = await get_password_hash_async(user_create.password)
+    row = {
+        "id": uuid.uuid4(),
+        "email": user_create.email,
+        "is_admin": is_admin,
+        "full_name": user_create.full_name,
+        "hashed_password": hashed_password,
+        "version": 0,
+    }
+    return user_create.email in await insert_users(session=session, rows=[row])
+
+
+async def register_user(
+    *, session: AsyncSession, user_register: UserRegister
+) -> User | None:
+    """Create a regular user, or return None if the email is already taken.
+
+    Only emails the filter may have seen pay for an index lookup up front;
+    a new email goes straight to hashing and inserting.
+    """
+    if may_be_registered(user_register.email):
+        existing_user = await get_user_by_email(
+            session=session, email=user_register.email
+        )
+        registry.inc(
+            "email_filter_checks_total",
+            format_labels(result="hit" if existing_user else "false_positive"),
+        )
+        if existing_user:
+            return None
+    else:
+        registry.inc("email_filter_checks_total", format_labels(result="miss"))
+
+    user_create = UserCreate.model_validate(user_register)
+    try:
+        return await create_user(session=session, user_create=user_create)
+    except IntegrityError:
+        # Registered concurrently, or by a worker this filter did not hear of
+        await session.rollback()
+        return None
+
+
+async def update_user(
+    *, session: AsyncSession, db_user: User, user_in: UserUpdate
+) -> User:
+    user_data = user_in.model_dump(exclude_unset=True)
+    extra_data: dict[str, Any] = {"version": db_user.version + 1}
+    if password := user_data.pop("password", None):
+        extra_data["hashed_password"] = await get_password_hash_async(password)
+
+    db_user.sqlmodel_update(user_data, update=extra_data)
+    session.add(db_user)
+    await session.commit()
+    await session.refresh(db_user)
+    invalidate_cached_user(db_user.id)
+    remember_email(db_user.email)
     return db_user
 
 
@@ -48,3 +238,247 @@ async def get_user_by_email(*, session: AsyncSession, email: str) -> User | None
     statement = select(User).where(User.email == email)
     result = await session.execute(statement)
     return result.scalars().first()
+
+
+async def get_user_by_id(
+    *, session: AsyncSession, user_id: uuid.UUID, use_cache: bool = False
+) -> User | None:
+    if use_cache:
+        cached_user = principal_cache.get(user_id)
+        if cached_user is not None:
+            return cached_user
+
+    db_user = await session.get(User, user_id)
+    if db_user and use_cache:
+        principal_cache.set(user_id, User.model_validate(db_user.model_dump()))
+
+    return db_user
+
+
+async def list_users(
+    *,
+    session: AsyncSession,
+    limit: int,
+    after: tuple[str, uuid.UUID] | None = None,
+) -> list[UserPublic]:
+    """Return up to `limit` users ordered by (email, id), after the `after` key.
+
+    Keyset pagination: each page is an index range scan starting right after
+    the previous page, so deep pages cost the same as the first one. Only the
+    public columns are selected.
+    """
+    statement = select(User.id, User.email, User.is_admin, User.full_name).order_by(
+        col(User.email), col(User.id)
+    )
+    if after is not None:
+        email, user_id = after
+        # The first condition lets the planner range scan the email index,
+        # the row comparison then only breaks (impossible) email ties
+        statement = statement.where(
+            col(User.email) >= email,
+            tuple_(col(User.email), col(User.id)) > (email, user_id),
+        )
+
+    result = await session.execute(statement.limit(limit))
+    # Rows were validated on their way in, and validating email addresses
+    # again would cost more than the query itself
+    return [UserPublic.model_construct(**row._mapping) for row in result]
+
+
+async def stream_users(
+    *, session: AsyncSession, batch_size: int
+) -> AsyncGenerator[Sequence[RowMapping]]:
+    """Yield every user's public columns, `batch_size` rows at a time.
+
+    Rows come from a server-side cursor and no ORM object is built, so
+    memory use depends on the batch size and not on the table size.
+    """
+    statement = (
+        select(User.id, User.email, User.is_admin, User.full_name)
+        .order_by(col(User.email))
+        .execution_options(yield_per=batch_size)
+    )
+    result = await session.stream(statement)
+    async for partition in result.mappings().partitions():
+        yield partition
+
+
+async def count_users(*, session: AsyncSession, exact: bool = False) -> int:
+    """Count users, by default from the planner statistics on PostgreSQL.
+
+    The estimate is as fresh as the last ANALYZE of the table, but takes
+    constant time where an exact count scans the whole table.
+    """
+    if not exact and session.get_bind().dialect.name == "postgresql":
+        statement = text(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:name AS regclass)"
+        )
+        estimate = (await session.execute(statement, {"name": '"user"'})).scalar()
+        # Negative until the table is first analyzed
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+
+    result = await session.execute(select(func.count()).select_from(User))
+    return result.scalar_one()
+
+
+async def insert_users(
+    *, session: AsyncSession, rows: Sequence[dict[str, Any]]
+) -> set[str]:
+    """Insert `rows` in as few statements as possible, skipping emails taken.
+
+    Commits and returns the emails that were inserted. Rows are plain column
+    dicts, no ORM object is built for them.
+    """
+    dialect = session.get_bind().dialect.name
+    inserted: set[str] = set()
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+        # Each row binds one parameter per column
+        columns = len(rows[0]) if rows else 1
+        rows_per_statement = MAX_BIND_PARAMETERS // columns
+        for start in range(0, len(rows), rows_per_statement):
+            statement = (
+                dialect_insert(User)
+                .values(list(rows[start : start + rows_per_statement]))
+                .on_conflict_do_nothing(index_elements=["email"])
+                .returning(col(User.email))
+            )
+            result = await session.execute(statement)
+            inserted.update(result.scalars())
+    else:
+        for row in rows:
+            try:
+                async with session.begin_nested():
+                    await session.execute(insert(User).values(row))
+            except IntegrityError:
+                continue
+            inserted.add(row["email"])
+
+    await session.commit()
+    for email in inserted:
+        remember_email(email)
+    return inserted
+
+
+async def _hash_passwords(passwords: Sequence[str]) -> list[str]:
+    # Leave part of the hashing pool to logins, and wait for room rather than
+    # failing the import when they fill it up
+    concurrency = settings.USER_IMPORT_HASH_CONCURRENCY or max(
+        password_hashing_pool.max_workers // 2, 1
+    )
+    limit = asyncio.Semaphore(concurrency)
+
+    async def hash_password(password: str) -> str:
+        async with limit:
+            delay = IMPORT_HASH_BACKOFF_SECONDS
+            while True:
+                try:
+                    hashing = password_hashing_pool.submit(get_password_hash, password)
+                except PasswordHashingBusyError:
+                    # Back off further while the pool stays full
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, IMPORT_HASH_MAX_BACKOFF_SECONDS)
+                    continue
+                # Without the timeout of logins: giving up on a hash that is
+                # running would only queue it again behind itself
+                return await hashing
+
+    return await asyncio.gather(*(hash_password(p) for p in passwords))
+
+
+def _add_import_issue(report: UserImportReport, issue: UserImportIssue) -> None:
+    if len(report.issues) < settings.USER_IMPORT_MAX_ISSUES:
+        report.issues.append(issue)
+    else:
+        report.issues_truncated = True
+
+
+async def _import_user_batch(
+    session: AsyncSession,
+    batch: Sequence[tuple[int, UserCreate]],
+    report: UserImportReport,
+) -> None:
+    hashed_passwords = await _hash_passwords([u.password for _, u in batch])
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "email": user_create.email,
+            "is_admin": user_create.is_admin,
+            "full_name": user_create.full_name,
+            "hashed_password": hashed_password,
+            "version": 0,
+        }
+        for (_, user_create), hashed_password in zip(
+            batch, hashed_passwords, strict=True
+        )
+    ]
+    inserted = await insert_users(session=session, rows=rows)
+
+    # An email repeated within the batch is created once, for its first line
+    for line, user_create in batch:
+        if user_create.email in inserted:
+            inserted.discard(user_create.email)
+            report.created += 1
+        else:
+            report.conflicts += 1
+            _add_import_issue(
+                report,
+                UserImportIssue(
+                    line=line,
+                    email=user_create.email,
+                    detail="Email already registered",
+                ),
+            )
+
+
+async def import_users(
+    *, session: AsyncSession, records: AsyncIterable[ParsedRecord]
+) -> UserImportReport:
+    """Create users from a stream of parsed records, batch by batch.
+
+    Each batch is hashed in parallel, inserted with one statement and
+    committed, so memory use does not grow with the size of the upload and
+    an interrupted import keeps the batches already done. Invalid records
+    and emails already taken are reported and skipped.
+    """
+    report = UserImportReport()
+    batch: list[tuple[int, UserCreate]] = []
+
+    async for record in records:
+        if record.data is None:
+            report.invalid += 1
+            _add_import_issue(
+                report, UserImportIssue(line=record.line, detail=str(record.error))
+            )
+            continue
+
+        try:
+            user_create = UserCreate.model_validate(record.data)
+        except ValidationError as e:
+            # Only field names and messages, the input holds a password
+            detail = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in e.errors(include_input=False)
+            )
+            email = record.data.get("email")
+            report.invalid += 1
+            _add_import_issue(
+                report,
+                UserImportIssue(
+                    line=record.line,
+                    email=email if isinstance(email, str) else None,
+                    detail=detail,
+                ),
+            )
+            continue
+
+        batch.append((record.line, user_create))
+        if len(batch) >= settings.USER_IMPORT_BATCH_SIZE:
+            await _import_user_batch(session, batch, report)
+            batch = []
+
+    if batch:
+        await _import_user_batch(session, batch, report)
+
+    return report
@@ -1,21 +1,187 @@
 from __future__ import annotations
 
+import itertools
+import time
+
 from typing import TYPE_CHECKING
+from typing import Any
+from typing import TypedDict
+
+import structlog
 
+from sqlalchemy import Select
+from sqlalchemy import exc
+from sqlalchemy import make_url
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.tasks.periodic import PeriodicTask
 
 
 if TYPE_CHECKING:
     from collections.abc import AsyncGenerator
+    from collections.abc import Callable
+    from collections.abc import Sequence
+    from contextlib import AbstractAsyncContextManager
+
+    from sqlalchemy import Engine
+    from sqlalchemy.engine import Connection
+    from sqlalchemy.ext.asyncio import AsyncEngine
+    from sqlalchemy.orm import Mapper
+    from sqlalchemy.pool import ConnectionPoolEntry
+    from sqlalchemy.pool import PoolProxiedConnection
+
+
+logger = structlog.get_logger(__name__)
+
+# Lazily evaluated, so it can be used at runtime in dependency annotations
+type SessionFactory = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+
+class PoolStats(TypedDict):
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    overflow_connections: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also records checkout wait times and overflow usage."""
+
+    def __init__(self, creator: Any, **kw: Any) -> None:
+        super().__init__(creator, **kw)
+        self.checkouts = 0
+        self.overflow_connections = 0
+        self.timeouts = 0
+        self.wait_ns_total = 0
+        self.wait_ns_max = 0
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter_ns()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        else:
+            self.checkouts += 1
+            return connection
+        finally:
+            waited = time.perf_counter_ns() - started
+            self.wait_ns_total += waited
+            self.wait_ns_max = max(self.wait_ns_max, waited)
+
+    def _create_connection(self) -> ConnectionPoolEntry:
+        # Called right after the overflow counter was bumped for a new
+        # connection, so a positive overflow means it is beyond pool_size
+        if self.overflow() > 0:
+            self.overflow_connections += 1
+        return super()._create_connection()
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.size(),
+            checked_in=self.checkedin(),
+            checked_out=self.checkedout(),
+            overflow=max(self.overflow(), 0),
+            checkouts=self.checkouts,
+            overflow_connections=self.overflow_connections,
+            timeouts=self.timeouts,
+            wait_seconds_total=self.wait_ns_total / 1e9,
+            wait_seconds_max=self.wait_ns_max / 1e9,
+        )
+
+
+def create_engine(url: str) -> AsyncEngine:
+    connect_args: dict[str, Any] = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        cache_size = settings.DB_STATEMENT_CACHE_SIZE
+        connect_args["prepared_statement_cache_size"] = cache_size
+
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+class ReplicaSet:
+    """Hands out replica engines in round-robin order."""
+
+    def __init__(self, engines: Sequence[AsyncEngine]) -> None:
+        self.engines = list(engines)
+        self._cycle = itertools.cycle([e.sync_engine for e in self.engines])
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def next(self) -> Engine:
+        return next(self._cycle)
+
+
+class RoutingSession(Session):
+    """Session that sends plain reads to a replica and the rest to the primary.
 
+    Each session sticks to a single replica, picked round-robin on its first
+    read. As soon as it writes (a flush or a DML statement) it is pinned to
+    the primary for the rest of its life, so read-after-write sequences see
+    their own writes. Use `pin_to_primary` to pin it up front.
+    """
 
-engine = create_async_engine(str(settings.POSTGRES_ASYNC_URI), pool_pre_ping=True)
+    def __init__(
+        self, *args: Any, replicas: ReplicaSet | None = None, **kw: Any
+    ) -> None:
+        super().__init__(*args, **kw)
+        self.replicas = replicas
+        self.pinned_to_primary = False
+        self._replica: Engine | None = None
+
+    def get_bind(
+        self,
+        mapper: Mapper[Any] | type[Any] | None = None,
+        *,
+        clause: Any = None,
+        **kw: Any,
+    ) -> Engine | Connection:
+        is_plain_read = isinstance(clause, Select) and clause._for_update_arg is None
+        if self._flushing or (clause is not None and not is_plain_read):
+            self.pinned_to_primary = True
+
+        if self.replicas and is_plain_read and not self.pinned_to_primary:
+            if self._replica is None:
+                self._replica = self.replicas.next()
+            return self._replica
+
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+def pin_to_primary(session: AsyncSession) -> None:
+    """Route every following statement of `session` to the primary."""
+    if isinstance(session.sync_session, RoutingSession):
+        session.sync_session.pinned_to_primary = True
+
+
+engine = create_engine(str(settings.POSTGRES_ASYNC_URI))
+replica_engines = [create_engine(str(uri)) for uri in settings.POSTGRES_REPLICA_URIS]
 AsyncSessionFactory = async_sessionmaker(
     bind=engine,
+    sync_session_class=RoutingSession,
+    replicas=ReplicaSet(replica_engines),
     autoflush=False,
     expire_on_commit=False,
 )
@@ -24,3 +190,54 @@ AsyncSessionFactory = async_sessionmaker(
 async def get_session() -> AsyncGenerator[AsyncSession]:
     async with AsyncSessionFactory() as session:
         yield session
+
+
+def get_session_factory() -> SessionFactory:
+    """Dependency for work that outlives the request handler.
+
+    Sessions from `get_session` are closed before a streaming response body
+    or a background task runs, those open their own session from this
+    factory instead.
+    """
+    return AsyncSessionFactory
+
+
+def get_pool_stats(db_engine: AsyncEngine = engine) -> PoolStats | None:
+    pool = db_engine.pool
+    if not isinstance(pool, InstrumentedAsyncQueuePool):
+        return None
+    return pool.stats()
+
+
+async def check_pool_liveness(db_engine: AsyncEngine = engine) -> bool:
+    """Ping the database, dropping every pooled connection if it fails.
+
+    Run periodically, this replaces the per-checkout round trip of
+    `pool_pre_ping` when DB_POOL_PRE_PING is turned off.
+    """
+    try:
+        async with db_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    except (exc.DBAPIError, OSError) as e:
+        logger.warning("Database liveness check failed, recycling the pool", error=e)
+        await db_engine.dispose()
+        return False
+
+    return True
+
+
+async def check_pools_liveness() -> None:
+    for db_engine in (engine, *replica_engines):
+        await check_pool_liveness(db_engine)
+
+
+async def dispose_engines() -> None:
+    for db_engine in (engine, *replica_engines):
+        await db_engine.dispose()
+
+
+pool_liveness_check = PeriodicTask(
+    "db-pool-liveness-check",
+    check_pools_liveness,
+    interval=settings.DB_POOL_LIVENESS_INTERVAL_SECONDS,
+)
@@ -1,39 +1,67 @@
+"""Seed the database, run it once before starting the workers:
+
+python -m fastapi_react_example_backend.initial_data
+"""
+
 from __future__ import annotations
 
+import asyncio
+import time
+
+from typing import TYPE_CHECKING
+
 import structlog
 
 from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.logging_config import setup_logging
+from fastapi_react_example_backend.core.logging_config import stop_logging
 from fastapi_react_example_backend.crud import user as user_crud
 from fastapi_react_example_backend.db.session import AsyncSessionFactory
+from fastapi_react_example_backend.db.session import dispose_engines
 from fastapi_react_example_backend.models.user import UserCreate
 
 
+if TYPE_CHECKING:
+    from fastapi_react_example_backend.db.session import SessionFactory
+
+
 logger = structlog.get_logger(__name__)
 
 
-async def init_db() -> None:
-    async with AsyncSessionFactory() as session:
-        user = await user_crud.get_user_by_email(
-            session=session, email=settings.ADMIN_EMAIL
+async def init_db(session_factory: SessionFactory = AsyncSessionFactory) -> bool:
+    """Create the admin user if it does not exist, returning whether it did."""
+    started = time.perf_counter_ns()
+    user_create = UserCreate(
+        email=settings.ADMIN_EMAIL,
+        password=settings.ADMIN_PASSWORD,
+        full_name="Admin User",
+    )
+
+    async with session_factory() as session:
+        created = await user_crud.create_user_if_missing(
+            session=session, user_create=user_create, is_admin=True
         )
-        if user:
-            logger.info("Admin user already exists, skipping creation.")
-            return
 
-        user_create = UserCreate(
+    duration = f"{(time.perf_counter_ns() - started) / 1_000_000:.3f} ms"
+    if created:
+        logger.info(
+            "Admin user created successfully.",
             email=settings.ADMIN_EMAIL,
-            password=settings.ADMIN_PASSWORD,
-            full_name="Admin User",
-        )
-        await user_crud.create_user(
-            session=session,
-            user_create=user_create,
-            is_admin=True,
+            duration=duration,
         )
-        logger.info("Admin user created successfully.", email=settings.ADMIN_EMAIL)
+    else:
+        logger.info("Admin user already exists, skipping creation.", duration=duration)
+    return created
 
 
 async def main() -> None:
     logger.info("Initializing database with initial data...")
     await init_db()
+    await dispose_engines()
     logger.info("Database initialization complete.")
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(main())
+    stop_logging()
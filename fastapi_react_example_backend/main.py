@@ -1,23 +1,48 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import time
+
 from contextlib import asynccontextmanager
 from typing import TYPE_CHECKING
 
 import structlog
 
 from fastapi import FastAPI
+from fastapi import status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from fastapi_react_example_backend import IMPORT_STARTED_NS
+from fastapi_react_example_backend.api.metrics import flush_metrics
+from fastapi_react_example_backend.api.metrics import metrics_flush
+from fastapi_react_example_backend.api.metrics import multiprocess_store
+from fastapi_react_example_backend.api.metrics import router as metrics_router
+from fastapi_react_example_backend.api.responses import FastJSONResponse
 from fastapi_react_example_backend.api.v1.api import router as api_v1_router
+from fastapi_react_example_backend.api.well_known import router as well_known_router
 from fastapi_react_example_backend.core.config import settings
 from fastapi_react_example_backend.core.logging_config import setup_logging
+from fastapi_react_example_backend.core.logging_config import stop_logging
+from fastapi_react_example_backend.core.metrics import registry
+from fastapi_react_example_backend.core.security import PasswordHashingBusyError
+from fastapi_react_example_backend.core.security import password_hashing_pool
+from fastapi_react_example_backend.db.session import dispose_engines
+from fastapi_react_example_backend.db.session import pool_liveness_check
 from fastapi_react_example_backend.initial_data import init_db
+from fastapi_react_example_backend.middleware.structlog import REQUEST_ID_HEADER
+from fastapi_react_example_backend.middleware.structlog import AccessLogSampler
 from fastapi_react_example_backend.middleware.structlog import StructlogMiddleware
+from fastapi_react_example_backend.tasks.email_filter import preload_email_filter
+from fastapi_react_example_backend.tasks.token_reaper import refresh_token_reaper
 
 
 if TYPE_CHECKING:
     from collections.abc import AsyncGenerator
 
+    from fastapi import Request
+
 setup_logging()
 logger = structlog.get_logger(__name__)
 
@@ -25,13 +50,43 @@ logger = structlog.get_logger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
     logger.info(f"Starting '{settings.PROJECT_NAME}' app...")
-    await init_db()
+    started = time.perf_counter_ns()
+    if settings.SEED_ON_STARTUP:
+        await init_db()
+    if settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        refresh_token_reaper.start()
+    if settings.DB_POOL_LIVENESS_INTERVAL_SECONDS > 0:
+        pool_liveness_check.start()
+    if settings.METRICS_ENABLED and multiprocess_store is not None:
+        metrics_flush.start()
+    email_filter_loader = asyncio.create_task(
+        preload_email_filter(), name="email-filter-loader"
+    )
+    logger.info(
+        f"Started '{settings.PROJECT_NAME}' app",
+        duration=f"{(time.perf_counter_ns() - started) / 1_000_000:.3f} ms",
+    )
     yield
     logger.info(f"Stopping '{settings.PROJECT_NAME}' app...")
+    await refresh_token_reaper.stop()
+    await pool_liveness_check.stop()
+    await metrics_flush.stop()
+    email_filter_loader.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await email_filter_loader
+    if settings.METRICS_ENABLED:
+        await flush_metrics()  # publish the final totals of this worker
+    password_hashing_pool.shutdown()
+    await dispose_engines()
+    stop_logging()
 
 
-app = FastAPI(lifespan=lifespan)
-app.add_middleware(StructlogMiddleware)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(
+    StructlogMiddleware,
+    metrics=registry if settings.METRICS_ENABLED else None,
+    sampler=AccessLogSampler(settings.LOG_ACCESS_SAMPLE_RATES),
+)
 
 if settings.BACKEND_CORS_ORIGINS:
     logger.info("CORS enabled!", cors_origins=settings.BACKEND_CORS_ORIGINS)
@@ -41,12 +96,34 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
-        expose_headers=["X-Request-ID"],
+        expose_headers=[REQUEST_ID_HEADER],
+    )
+
+
+@app.exception_handler(PasswordHashingBusyError)
+async def password_hashing_busy_handler(
+    request: Request, exc: PasswordHashingBusyError
+) -> JSONResponse:
+    logger.warning("Password hashing pool is busy", reason=str(exc))
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Service temporarily overloaded, try again later"},
+        headers={"Retry-After": "1"},
     )
 
+
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 app.include_router(api_v1_router, prefix=settings.ROUTER_API_V1_PREFIX, tags=["v1"])
+app.include_router(well_known_router)
 
 
 @app.get("/")
 def read_root() -> dict[str, str]:
     return {"Hello": "World"}
+
+
+logger.info(
+    "Imported app",
+    duration=f"{(time.perf_counter_ns() - IMPORT_STARTED_NS) / 1_000_000:.3f} ms",
+)
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import functools
+import random
+import re
+import secrets
 import time
 
 from typing import TYPE_CHECKING
@@ -8,17 +12,23 @@ from typing import TypedDict
 
 import structlog
 
-from asgi_correlation_id import correlation_id  # TODO: Check why it is not working
 from starlette.responses import JSONResponse
 from uvicorn.protocols.utils import get_path_with_query_string
 
+from fastapi_react_example_backend.core.metrics import format_labels
+
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+    from collections.abc import Mapping
+
     from starlette.types import ASGIApp
     from starlette.types import Receive
     from starlette.types import Scope
     from starlette.types import Send
 
+    from fastapi_react_example_backend.core.metrics import MetricsRegistry
+
 
 app_logger = structlog.get_logger("fastapi_react_example_backend")
 access_logger = structlog.get_logger("fastapi_react_example_backend.access")
@@ -29,28 +39,156 @@ class AccessInfo(TypedDict, total=False):
     start_time: float
 
 
+REQUEST_ID_HEADER = "X-Request-ID"
+_REQUEST_ID_HEADER_KEY = REQUEST_ID_HEADER.lower().encode("latin-1")
+# Incoming IDs are echoed back and logged, so only accept harmless ones
+_VALID_REQUEST_ID = re.compile(rb"[A-Za-z0-9._:-]{1,128}")
+
+HTTP_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT")
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _request_labels(method: str, route: str, status_code: int) -> tuple[str, str]:
+    """Label sets of the request counter and of the latency histogram."""
+    status_class = f"{status_code // 100}xx"
+    return (
+        format_labels(method=method, route=route, status=status_class),
+        format_labels(method=method, route=route),
+    )
+
+
+def get_request_id(scope: Scope) -> str:
+    """Return the client's X-Request-ID if it is valid, otherwise a new ID."""
+    headers: list[tuple[bytes, bytes]] = scope["headers"]
+    for name, value in headers:
+        if name == _REQUEST_ID_HEADER_KEY:
+            if _VALID_REQUEST_ID.fullmatch(value):
+                return value.decode("ascii")
+            break
+    return secrets.token_hex(16)
+
+
+def _route_template(scope: Scope) -> str:
+    # Label by route template rather than path to keep cardinality bounded
+    return getattr(scope.get("route"), "path", None) or "<unmatched>"
+
+
+def _record_request(
+    metrics: MetricsRegistry,
+    method: str,
+    route: str,
+    status_code: int,
+    process_time: float,
+) -> None:
+    method = method if method in HTTP_METHODS else "OTHER"
+    counter_labels, histogram_labels = _request_labels(method, route, status_code)
+
+    metrics.inc("http_requests_total", counter_labels)
+    metrics.observe(
+        "http_request_duration_seconds", histogram_labels, process_time / 1e9
+    )
+
+
+class AccessLogSampler:
+    """Picks the share of access log lines kept for each kind of response.
+
+    Rates are keyed by status class (`"2xx"`), or by status class and route
+    template (`"2xx /api/v1/users/me"`) which takes precedence. Responses
+    matching neither are always logged.
+    """
+
+    def __init__(
+        self,
+        rates: Mapping[str, float],
+        rand: Callable[[], float] = random.random,
+    ) -> None:
+        self.rates = dict(rates)
+        self.rand = rand
+        self._rate_for = functools.lru_cache(maxsize=1024)(self._lookup_rate)
+
+    def _lookup_rate(self, route: str, status_code: int) -> float:
+        status_class = f"{status_code // 100}xx"
+        rate = self.rates.get(f"{status_class} {route}")
+        if rate is None:
+            rate = self.rates.get(status_class, 1.0)
+        return rate
+
+    def sample_rate(self, route: str, status_code: int) -> float | None:
+        """Return the rate the line was sampled at, or None to drop it."""
+        if not self.rates:
+            return 1.0
+
+        rate = self._rate_for(route, status_code)
+        if rate < 1.0 and self.rand() >= rate:
+            return None
+        return rate
+
+
+def _log_access(
+    scope: Scope,
+    request_id: str,
+    status_code: int,
+    process_time: float,
+    sample_rate: float,
+) -> None:
+    client_host, client_port = scope["client"]
+    http_method = scope["method"]
+    http_version = scope["http_version"]
+    url = get_path_with_query_string(scope)  # type: ignore[arg-type]
+
+    extra = {"sample_rate": sample_rate} if sample_rate < 1.0 else {}
+    access_logger.info(
+        f"""{client_host}:{client_port} - "{http_method} {scope["path"]} HTTP/{http_version}" {status_code}""",
+        http={
+            "url": str(url),
+            "status_code": status_code,
+            "method": http_method,
+            "request_id": request_id,
+            "version": http_version,
+        },
+        network={"client": {"ip": client_host, "port": client_port}},
+        duration=f"{process_time / 1_000_000:.3f} ms",
+        process_time_ns=process_time,
+        **extra,
+    )
+
+
 class StructlogMiddleware:
-    def __init__(self, app: ASGIApp) -> None:
+    def __init__(
+        self,
+        app: ASGIApp,
+        metrics: MetricsRegistry | None = None,
+        sampler: AccessLogSampler | None = None,
+    ) -> None:
         self.app = app
+        self.metrics = metrics
+        self.sampler = sampler
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
 
+        request_id = get_request_id(scope)
+        request_id_header = (_REQUEST_ID_HEADER_KEY, request_id.encode("ascii"))
         structlog.contextvars.clear_contextvars()
-        structlog.contextvars.bind_contextvars(request_id=correlation_id.get() or "-")
+        structlog.contextvars.bind_contextvars(request_id=request_id)
 
         info = AccessInfo()
+        if self.metrics is not None:
+            self.metrics.add_gauge("http_requests_in_flight", "", 1)
 
         # Inner send function
         async def inner_send(message: Any) -> None:
             if message["type"] == "http.response.start":
                 info["status_code"] = message["status"]
+                message["headers"] = [*message.get("headers", ()), request_id_header]
             await send(message)
 
+        info["start_time"] = time.perf_counter_ns()
         try:
-            info["start_time"] = time.perf_counter_ns()
             await self.app(scope, receive, inner_send)
         except Exception as e:
             app_logger.exception(
@@ -66,25 +204,30 @@ class StructlogMiddleware:
                     "error": "Internal Server Error",
                     "message": "An unexpected error occurred.",
                 },
+                headers={REQUEST_ID_HEADER: request_id},
             )
             await response(scope, receive, send)
         finally:
-            process_time = time.perf_counter_ns() - info["start_time"]
-            client_host, client_port = scope["client"]
-            http_method = scope["method"]
-            http_version = scope["http_version"]
-            url = get_path_with_query_string(scope)  # type: ignore[arg-type]
-
-            access_logger.info(
-                f"""{client_host}:{client_port} - "{http_method} {scope["path"]} HTTP/{http_version}" {info["status_code"]}""",
-                http={
-                    "url": str(url),
-                    "status_code": info["status_code"],
-                    "method": http_method,
-                    "request_id": correlation_id.get() or "-",
-                    "version": http_version,
-                },
-                network={"client": {"ip": client_host, "port": client_port}},
-                duration=f"{process_time / 1_000_000:.3f} ms",
-                process_time_ns=process_time,
-            )
+            try:
+                process_time = time.perf_counter_ns() - info["start_time"]
+                # No response was started when the request was cancelled
+                status_code = info.get("status_code", 500)
+                route = _route_template(scope)
+                if self.metrics is not None:
+                    _record_request(
+                        self.metrics, scope["method"], route, status_code, process_time
+                    )
+
+                # Sampled out lines are dropped before any of their fields is built
+                sample_rate = (
+                    self.sampler.sample_rate(route, status_code)
+                    if self.sampler
+                    else 1.0
+                )
+                if sample_rate is not None:
+                    _log_access(
+                        scope, request_id, status_code, process_time, sample_rate
+                    )
+            finally:
+                if self.metrics is not None:
+                    self.metrics.add_gauge("http_requests_in_flight", "", -1)
@@ -6,6 +6,7 @@ from datetime import datetime  # noqa: TC003
 from typing import TYPE_CHECKING
 
 from sqlalchemy import Column
+from sqlalchemy import LargeBinary
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import relationship
 from sqlmodel import Field
@@ -21,6 +22,12 @@ if TYPE_CHECKING:
 
 class TokenPayload(SQLModel):
     sub: str | None = Field(default=None)
+    # Only present on tokens issued with ACCESS_TOKEN_EMBED_CLAIMS enabled
+    ver: int | None = Field(default=None)
+    adm: bool | None = Field(default=None)
+    email: str | None = Field(default=None)
+    name: str | None = Field(default=None)
+    uv: int | None = Field(default=None)
 
 
 class Token(SQLModel):
@@ -31,9 +38,14 @@ class Token(SQLModel):
 
 class RefreshToken(SQLModel, table=True):
     id: int = Field(primary_key=True)
-    token: str = Field(index=True, unique=True)
+    # SHA-256 digest of the token, the raw value is only ever sent to the client
+    token_hash: bytes = Field(
+        sa_column=Column(LargeBinary(32), nullable=False, unique=True, index=True)
+    )
     user_id: uuid.UUID = Field(foreign_key="user.id")
-    expires_at: datetime = Field(sa_column=Column(AwareDatetime, nullable=False))
+    expires_at: datetime = Field(
+        sa_column=Column(AwareDatetime, nullable=False, index=True)
+    )
 
     user: Mapped[User] = Relationship(
         sa_relationship=relationship("User", back_populates="refresh_tokens")
@@ -29,6 +29,12 @@ class UserCreate(UserBase):
     password: str = Field(min_length=8, max_length=128)
 
 
+class UserRegister(SQLModel):
+    email: EmailStr = Field(max_length=255)
+    password: str = Field(min_length=8, max_length=128)
+    full_name: str | None = Field(default=None, max_length=255)
+
+
 class UserUpdate(SQLModel):
     email: EmailStr | None = None
     is_admin: bool | None = None
@@ -49,6 +55,7 @@ class UserUpdatePasswordMe(SQLModel):
 class User(UserBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str = Field()
+    version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
 
     refresh_tokens: Mapped[list[RefreshToken]] = Relationship(
         sa_relationship=relationship(
@@ -61,6 +68,32 @@ class UserPublic(UserBase):
     id: uuid.UUID
 
 
+class UserPrincipal(SQLModel):
+    id: uuid.UUID
+    email: str
+    is_admin: bool
+    full_name: str | None = None
+    version: int = 0
+
+
 class UsersPublic(SQLModel):
     data: list[UserPublic] = Field(default_factory=list)
-    count: int = Field(default=0)
+    # Total number of users, possibly estimated, None when not requested
+    count: int | None = Field(default=None)
+    # Opaque cursor of the next page, None on the last one
+    next_cursor: str | None = None
+
+
+class UserImportIssue(SQLModel):
+    line: int
+    email: str | None = None
+    detail: str
+
+
+class UserImportReport(SQLModel):
+    created: int = 0
+    conflicts: int = 0
+    invalid: int = 0
+    # Capped at USER_IMPORT_MAX_ISSUES, the counters above are always complete
+    issues: list[UserImportIssue] = Field(default_factory=list)
+    issues_truncated: bool = False
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import time
+
+from typing import TYPE_CHECKING
+
+import structlog
+
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.crud import user as user_crud
+from fastapi_react_example_backend.db.session import AsyncSessionFactory
+
+
+if TYPE_CHECKING:
+    from fastapi_react_example_backend.db.session import SessionFactory
+
+
+logger = structlog.get_logger(__name__)
+
+
+async def load_email_filter(
+    session_factory: SessionFactory = AsyncSessionFactory,
+) -> int:
+    """Stream the email column into the sign-up Bloom filter."""
+    started = time.perf_counter_ns()
+
+    async with session_factory() as session:
+        loaded = await user_crud.load_registered_emails(
+            session=session, batch_size=settings.USER_EXPORT_BATCH_SIZE
+        )
+
+    elapsed = time.perf_counter_ns() - started
+    logger.info(
+        "Loaded the registered emails filter",
+        emails=loaded,
+        capacity=settings.EMAIL_FILTER_CAPACITY,
+        duration=f"{elapsed / 1_000_000:.3f} ms",
+    )
+    if loaded > settings.EMAIL_FILTER_CAPACITY:
+        logger.warning(
+            "More emails than EMAIL_FILTER_CAPACITY, sign-ups will check the "
+            "database more often"
+        )
+    return loaded
+
+
+async def preload_email_filter() -> None:
+    # Sign-ups check the database until the filter is loaded, so a failure
+    # only costs performance
+    try:
+        await load_email_filter()
+    except Exception:
+        logger.exception("Could not load the registered emails filter")
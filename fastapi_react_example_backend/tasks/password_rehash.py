@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import structlog
+
+from fastapi_react_example_backend.core.metrics import registry
+from fastapi_react_example_backend.crud import user as user_crud
+
+
+if TYPE_CHECKING:
+    import uuid
+
+    from fastapi_react_example_backend.db.session import SessionFactory
+
+
+logger = structlog.get_logger(__name__)
+
+
+async def rehash_user_password(
+    session_factory: SessionFactory,
+    user_id: uuid.UUID,
+    hashed_password: str,
+    password: str,
+) -> None:
+    """Upgrade an outdated password hash after the login response is sent."""
+    # The old hash still works, so a failure is only logged
+    try:
+        async with session_factory() as session:
+            updated = await user_crud.rehash_password(
+                session=session,
+                user_id=user_id,
+                hashed_password=hashed_password,
+                password=password,
+            )
+    except Exception:
+        logger.exception("Could not rehash the password", user_id=str(user_id))
+        return
+
+    if updated:
+        registry.inc("password_rehashes_total")
+        logger.info("Rehashed an outdated password", user_id=str(user_id))
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+
+from typing import TYPE_CHECKING
+
+import structlog
+
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable
+    from collections.abc import Callable
+
+
+logger = structlog.get_logger(__name__)
+
+
+class PeriodicTask:
+    """Runs an async callable every `interval` seconds on the event loop.
+
+    Failures are logged and do not stop the schedule. `stop` cancels the
+    task and waits for it, so it is safe to call from the app lifespan even
+    if the task was never started.
+    """
+
+    def __init__(
+        self, name: str, func: Callable[[], Awaitable[object]], *, interval: float
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name=self.name)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.func()
+            except Exception:
+                logger.exception("Periodic task failed", task=self.name)
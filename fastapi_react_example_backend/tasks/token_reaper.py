@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import time
+
+from typing import TYPE_CHECKING
+
+import structlog
+
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.crud import token as token_crud
+from fastapi_react_example_backend.db.session import AsyncSessionFactory
+from fastapi_react_example_backend.tasks.periodic import PeriodicTask
+
+
+if TYPE_CHECKING:
+    from fastapi_react_example_backend.db.session import SessionFactory
+
+
+logger = structlog.get_logger(__name__)
+
+
+async def purge_expired_refresh_tokens(
+    session_factory: SessionFactory = AsyncSessionFactory,
+    batch_size: int | None = None,
+) -> int:
+    """Delete every expired refresh token, one bounded batch per transaction."""
+    batch_size = batch_size or settings.REFRESH_TOKEN_PURGE_BATCH_SIZE
+    started = time.perf_counter_ns()
+    purged = 0
+
+    async with session_factory() as session:
+        while True:
+            deleted = await token_crud.delete_expired_refresh_tokens(
+                session=session, batch_size=batch_size
+            )
+            purged += deleted
+            if deleted < batch_size:
+                break
+
+    elapsed = time.perf_counter_ns() - started
+    logger.info(
+        "Purged expired refresh tokens",
+        purged=purged,
+        duration=f"{elapsed / 1_000_000:.3f} ms",
+    )
+    return purged
+
+
+refresh_token_reaper = PeriodicTask(
+    "refresh-token-reaper",
+    purge_expired_refresh_tokens,
+    interval=settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS,
+)
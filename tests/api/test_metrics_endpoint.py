@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from fastapi import status
+
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_metrics_endpoint(client: AsyncClient) -> None:
+    await client.get("/")
+    await client.get("/does-not-exist")
+
+    response = await client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    # Requests are labelled by route template, unknown paths share one label
+    body = response.text
+    assert 'http_requests_total{method="GET",route="/",status="2xx"}' in body
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="4xx"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/",le=' in body
+    assert "http_requests_in_flight 1" in body  # the scrape itself
+    assert 'cache_hits_total{cache="principal"}' in body
+    assert 'db_pool_checkouts_total{pool="primary"}' in body
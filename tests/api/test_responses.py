@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import json
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from fastapi_react_example_backend.api.responses import FastJSONResponse
+from fastapi_react_example_backend.models.user import UserPublic
+from fastapi_react_example_backend.models.user import UsersPublic
+
+
+def test_fast_json_response_matches_json_response() -> None:
+    page = UsersPublic(
+        data=[
+            UserPublic(id=uuid.uuid4(), email="fast@test.es", full_name="Fást"),
+            UserPublic(id=uuid.uuid4(), email="json@test.es", is_admin=True),
+        ],
+        count=2,
+        next_cursor=None,
+    )
+
+    response = FastJSONResponse(page)
+    expected = JSONResponse(jsonable_encoder(page))
+
+    assert response.media_type == "application/json"
+    assert json.loads(bytes(response.body)) == json.loads(bytes(expected.body))
+    # Already serialized data, as FastAPI passes it, renders the same
+    assert FastJSONResponse(jsonable_encoder(page)).body == response.body
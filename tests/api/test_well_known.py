@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from fastapi import status
+
+from fastapi_react_example_backend.api import well_known
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.token_keys import KeyRing
+from fastapi_react_example_backend.core.token_keys import SigningKey
+from fastapi_react_example_backend.core.token_keys import parse_signing_key
+from tests.keys import P256_PRIVATE_KEY
+
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_read_jwks(client: AsyncClient, monkeypatch: pytest.MonkeyPatch) -> None:
+    key_ring = KeyRing(
+        [
+            SigningKey(kid="hmac", secret="never-published"),
+            parse_signing_key("ec-1", P256_PRIVATE_KEY, "HS256"),
+        ],
+        "ec-1",
+    )
+    monkeypatch.setattr(well_known, "access_token_keys", key_ring)
+
+    response = await client.get("/.well-known/jwks.json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/jwk-set+json"
+    assert response.headers["cache-control"] == (
+        f"public, max-age={settings.JWKS_CACHE_MAX_AGE_SECONDS}"
+    )
+    assert [key["kid"] for key in response.json()["keys"]] == ["ec-1"]
+    assert "never-published" not in response.text
+
+    # Revalidating an unchanged key set costs no body
+    response = await client.get(
+        "/.well-known/jwks.json",
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
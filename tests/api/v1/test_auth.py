@@ -3,13 +3,22 @@ from __future__ import annotations
 from datetime import UTC
 from datetime import datetime
 from datetime import timedelta
+from ipaddress import ip_network
 from typing import TYPE_CHECKING
+from typing import Any
+from typing import NoReturn
 
 import pytest
 
+from fastapi import Request
 from fastapi import status
 
+from fastapi_react_example_backend.api.deps import get_client_ip
 from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.rate_limit import login_ip_limiter
+from fastapi_react_example_backend.core.security import hash_refresh_token
+from fastapi_react_example_backend.core.security import password_needs_rehash
+from fastapi_react_example_backend.core.security import pwd_context
 from fastapi_react_example_backend.crud import token as token_crud
 from fastapi_react_example_backend.crud import user as user_crud
 from fastapi_react_example_backend.models.token import RefreshToken
@@ -122,13 +131,13 @@ async def test_refresh_access_token_success(
     user = await user_crud.create_user(session=db_session, user_create=user_create_db)
 
     # Create refresh token for the user
-    refresh_token_db = await token_crud.create_refresh_token(
+    _, refresh_token = await token_crud.create_refresh_token(
         session=db_session, user_id=user.id
     )
 
     # Send refresh token request
     refresh_token_data = {
-        "refresh_token": refresh_token_db.token,
+        "refresh_token": refresh_token,
     }
     response = await client.post(
         f"{settings.ROUTER_API_V1_PREFIX}/auth/login/refresh-token",
@@ -153,7 +162,7 @@ async def test_refresh_access_token_success(
     assert token_data["refresh_token"] is not None
 
     # Assert new refresh token is different from the old one
-    assert token_data["refresh_token"] != refresh_token_db.token
+    assert token_data["refresh_token"] != refresh_token
 
 
 async def test_refresh_access_token_error_invalid_token(
@@ -191,7 +200,7 @@ async def test_refresh_access_token_error_expired_token(
 
     # Create expired refresh token for the user
     expired_refresh_token = RefreshToken(
-        token="expired_token",
+        token_hash=hash_refresh_token("expired_token"),
         expires_at=datetime.now(UTC) - timedelta(days=1),
         user_id=user.id,
     )
@@ -200,7 +209,7 @@ async def test_refresh_access_token_error_expired_token(
 
     # Send refresh token request
     refresh_token_data = {
-        "refresh_token": expired_refresh_token.token,
+        "refresh_token": "expired_token",
     }
     response = await client.post(
         f"{settings.ROUTER_API_V1_PREFIX}/auth/login/refresh-token",
@@ -229,13 +238,13 @@ async def test_refresh_access_token_error_reused_token(
     user = await user_crud.create_user(session=db_session, user_create=user_create_db)
 
     # Create refresh token for the user
-    refresh_token = await token_crud.create_refresh_token(
+    _, refresh_token = await token_crud.create_refresh_token(
         session=db_session, user_id=user.id
     )
 
     # Send refresh token request twice
     refresh_token_data = {
-        "refresh_token": refresh_token.token,
+        "refresh_token": refresh_token,
     }
     response_first_use = await client.post(
         f"{settings.ROUTER_API_V1_PREFIX}/auth/login/refresh-token",
@@ -271,3 +280,124 @@ async def test_refresh_access_token_error_reused_token(
     # Assert error message is present
     assert "detail" in response_data
     assert response_data["detail"] == "Invalid or expired refresh token"
+
+
+async def test_login_for_access_token_error_throttled(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    login_data = {"username": "Throttled@test.es", "password": "wrongpassword"}
+    for _ in range(settings.LOGIN_RATE_LIMIT_USERNAME_BURST):
+        await client.post(
+            f"{settings.ROUTER_API_V1_PREFIX}/auth/login/access-token", data=login_data
+        )
+
+    # Throttled attempts never reach the database or the password hash
+    async def fail_authenticate(**kwargs: Any) -> NoReturn:
+        raise AssertionError("Throttled logins must not be authenticated")
+
+    monkeypatch.setattr(user_crud, "authenticate", fail_authenticate)
+
+    response = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/auth/login/access-token",
+        data={**login_data, "username": "throttled@test.es"},
+    )
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) > 0
+
+
+async def test_login_for_access_token_success_is_not_throttled(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    email = "frequent@test.es"
+    password = "frequentpassword"
+    await user_crud.create_user(
+        session=db_session, user_create=UserCreate(email=email, password=password)
+    )
+
+    # Only failed attempts count against the username
+    for _ in range(settings.LOGIN_RATE_LIMIT_USERNAME_BURST + 1):
+        response = await client.post(
+            f"{settings.ROUTER_API_V1_PREFIX}/auth/login/access-token",
+            data={"username": email, "password": password},
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+
+async def test_login_for_access_token_throttles_the_forwarded_client_ip(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", [ip_network("127.0.0.1/32")])
+    monkeypatch.setattr(login_ip_limiter, "burst", 1)
+
+    async def login(forwarded_for: str) -> int:
+        response = await client.post(
+            f"{settings.ROUTER_API_V1_PREFIX}/auth/login/access-token",
+            data={"username": "proxied@test.es", "password": "wrongpassword"},
+            headers={"X-Forwarded-For": forwarded_for},
+        )
+        return response.status_code
+
+    # Clients behind the proxy get a bucket each
+    assert await login("198.51.100.1") == status.HTTP_401_UNAUTHORIZED
+    assert await login("198.51.100.2") == status.HTTP_401_UNAUTHORIZED
+    assert await login("198.51.100.1") == status.HTTP_429_TOO_MANY_REQUESTS
+    # Entries left of an untrusted hop are the client's own word
+    assert await login("203.0.113.9, 198.51.100.2") == (
+        status.HTTP_429_TOO_MANY_REQUESTS
+    )
+
+
+@pytest.mark.parametrize(
+    ("trusted_proxies", "forwarded_for", "client_ip"),
+    [
+        ([], "198.51.100.1", "127.0.0.1"),
+        (["127.0.0.1/32"], None, "127.0.0.1"),
+        (["127.0.0.1/32"], "198.51.100.1", "198.51.100.1"),
+        (["127.0.0.1/32"], "203.0.113.9, 198.51.100.1", "198.51.100.1"),
+        (["127.0.0.0/8", "10.0.0.0/8"], "198.51.100.1, 10.0.0.2", "198.51.100.1"),
+        (["127.0.0.1/32"], "not-an-ip, 127.0.0.1", "not-an-ip"),
+    ],
+)
+async def test_get_client_ip(
+    monkeypatch: pytest.MonkeyPatch,
+    trusted_proxies: list[str],
+    forwarded_for: str | None,
+    client_ip: str,
+) -> None:
+    monkeypatch.setattr(
+        settings, "TRUSTED_PROXIES", [ip_network(proxy) for proxy in trusted_proxies]
+    )
+    headers = (
+        [] if forwarded_for is None else [(b"x-forwarded-for", forwarded_for.encode())]
+    )
+    request = Request(
+        {"type": "http", "headers": headers, "client": ("127.0.0.1", 50000)}
+    )
+
+    assert get_client_ip(request) == client_ip
+
+
+async def test_login_rehashes_outdated_password(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    email = "rehash@test.es"
+    password = "rehashpassword"
+    user = await user_crud.create_user(
+        session=db_session, user_create=UserCreate(email=email, password=password)
+    )
+    # Hashed at a lower cost than the configured one
+    user.hashed_password = pwd_context.handler("bcrypt").using(rounds=4).hash(password)
+    db_session.add(user)
+    await db_session.commit()
+
+    response = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/auth/login/access-token",
+        data={"username": email, "password": password},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    # The background task ran before the test client returned
+    await db_session.refresh(user)
+    assert not password_needs_rehash(user.hashed_password)
+    assert pwd_context.verify(password, user.hashed_password)
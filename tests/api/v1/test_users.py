@@ -1,17 +1,39 @@
 from __future__ import annotations
 
+import base64
+import csv
+import io
+import json
+import uuid
+
 from typing import TYPE_CHECKING
+from typing import Any
+from typing import NoReturn
 
 import pytest
 
+from fastapi import HTTPException
 from fastapi import status
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import SQLModel
 
+from fastapi_react_example_backend.api.deps import get_current_principal
+from fastapi_react_example_backend.api.deps import get_current_principal_is_admin
+from fastapi_react_example_backend.api.v1.users import _export_users
 from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.security import create_access_token
+from fastapi_react_example_backend.core.security import create_user_access_token
 from fastapi_react_example_backend.crud import user as user_crud
 from fastapi_react_example_backend.models.user import UserCreate
+from fastapi_react_example_backend.models.user import UserUpdate
 
 
 if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+    from pathlib import Path
+
     from httpx import AsyncClient
     from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -92,3 +114,446 @@ async def test_read_user_me_error_invalid_token(
 
     # Assert status 401
     assert response_me.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+async def test_read_user_me_from_token_claims(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_EMBED_CLAIMS", True)
+
+    # Create test user in our test db
+    email = "testclaims@test.es"
+    password = "testclaimspassword"
+    full_name = "Test Claims"
+    user_create_db = UserCreate(email=email, password=password, full_name=full_name)
+    user = await user_crud.create_user(session=db_session, user_create=user_create_db)
+
+    # Login to get an access token with embedded claims
+    login_data = {
+        "username": email,
+        "password": password,
+    }
+    response_login = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/auth/login/access-token", data=login_data
+    )
+    assert response_login.status_code == status.HTTP_200_OK
+
+    # Any database lookup from now on would fail the request
+    async def fail_get_user_by_id(**kwargs: Any) -> NoReturn:
+        raise AssertionError("The user should not be loaded from the database")
+
+    monkeypatch.setattr(user_crud, "get_user_by_id", fail_get_user_by_id)
+
+    auth_headers = {
+        "Authorization": f"Bearer {response_login.json()['access_token']}",
+    }
+    response_me = await client.get(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/me", headers=auth_headers
+    )
+
+    # Assert status 200 and user data served from the claims
+    assert response_me.status_code == status.HTTP_200_OK
+    assert response_me.json() == {
+        "email": email,
+        "is_admin": False,
+        "full_name": full_name,
+        "id": str(user.id),
+    }
+
+
+async def test_admin_principal_rejects_outdated_claims(
+    db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_EMBED_CLAIMS", True)
+    admin = await user_crud.create_user(
+        session=db_session,
+        user_create=UserCreate(email="outdated@claims.es", password="claimspassword"),
+        is_admin=True,
+    )
+    principal = await get_current_principal(
+        session=db_session, token=create_user_access_token(admin)
+    )
+    assert (
+        await get_current_principal_is_admin(
+            session=db_session, current_principal=principal
+        )
+        == principal
+    )
+
+    # Any update bumps the user version past the `uv` claim of the token
+    await user_crud.update_user(
+        session=db_session, db_user=admin, user_in=UserUpdate(full_name="Renamed")
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_principal_is_admin(
+            session=db_session, current_principal=principal
+        )
+    assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+async def test_import_users_ndjson(
+    client: AsyncClient, db_session: AsyncSession, admin_auth_headers: dict[str, str]
+) -> None:
+    await user_crud.create_user(
+        session=db_session,
+        user_create=UserCreate(email="taken@import.es", password="takenpassword"),
+    )
+    lines = [
+        '{"email": "first@import.es", "password": "firstpassword"}',
+        "",
+        '{"email": "taken@import.es", "password": "takenpassword"}',
+        '{"email": "first@import.es", "password": "againpassword"}',
+        '{"email": "not-an-email", "password": "shortpw"}',
+        "not json",
+        '{"email": "second@import.es", "password": "secondpassword", "full_name": "S"}',
+    ]
+
+    # Stream the upload in small chunks that split lines apart
+    body = "\n".join(lines).encode()
+
+    async def upload() -> AsyncGenerator[bytes]:
+        for i in range(0, len(body), 7):
+            yield body[i : i + 7]
+
+    response = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/import",
+        headers={**admin_auth_headers, "Content-Type": "application/x-ndjson"},
+        content=upload(),
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    report = response.json()
+    assert report["created"] == 2
+    assert report["conflicts"] == 2
+    assert report["invalid"] == 2
+    # Conflicts are only known once their batch is inserted
+    assert sorted((i["line"], i["email"] or "") for i in report["issues"]) == [
+        (3, "taken@import.es"),
+        (4, "first@import.es"),
+        (5, "not-an-email"),
+        (6, ""),
+    ]
+    # Validation errors never echo the submitted values
+    assert "shortpw" not in response.text
+
+    user = await user_crud.get_user_by_email(
+        session=db_session, email="second@import.es"
+    )
+    assert user is not None
+    assert user.full_name == "S"
+    assert await user_crud.authenticate(
+        session=db_session, email="second@import.es", password="secondpassword"
+    )
+
+
+async def test_import_users_csv(
+    client: AsyncClient, db_session: AsyncSession, admin_auth_headers: dict[str, str]
+) -> None:
+    body = (
+        "email,password,full_name,is_admin\r\n"
+        'csv1@import.es,csv1password,"Doe, Jane",true\r\n'
+        "csv2@import.es,csv2password,,\r\n"
+        "csv3@import.es,csv3password\r\n"
+    )
+
+    response = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/import?format=csv",
+        headers=admin_auth_headers,
+        content=body,
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["created"] == 2
+    assert response.json()["issues"] == [
+        {"line": 4, "email": None, "detail": "Expected 4 fields"}
+    ]
+
+    user = await user_crud.get_user_by_email(session=db_session, email="csv1@import.es")
+    assert user is not None
+    assert user.full_name == "Doe, Jane"
+    assert user.is_admin is True
+
+
+async def test_import_users_error_unsupported_format(
+    client: AsyncClient, admin_auth_headers: dict[str, str]
+) -> None:
+    response = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/import",
+        headers={**admin_auth_headers, "Content-Type": "application/json"},
+        content="[]",
+    )
+
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+async def test_import_users_error_not_admin(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    user = await user_crud.create_user(
+        session=db_session,
+        user_create=UserCreate(email="notadmin@import.es", password="notadminpassword"),
+    )
+
+    response = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/import?format=ndjson",
+        headers={"Authorization": f"Bearer {create_access_token(user.id)}"},
+        content="",
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+async def test_import_users_error_demoted_admin(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "ACCESS_TOKEN_EMBED_CLAIMS", True)
+    admin = await user_crud.create_user(
+        session=db_session,
+        user_create=UserCreate(email="demoted@import.es", password="demotedpassword"),
+        is_admin=True,
+    )
+    # The token still claims the admin role after the user is demoted
+    token = create_user_access_token(admin)
+    await user_crud.update_user(
+        session=db_session, db_user=admin, user_in=UserUpdate(is_admin=False)
+    )
+
+    response = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/import?format=ndjson",
+        headers={"Authorization": f"Bearer {token}"},
+        content='{"email": "new-admin@import.es", "password": "newadminpassword", '
+        '"is_admin": true}\n',
+    )
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert (
+        await user_crud.get_user_by_email(
+            session=db_session, email="new-admin@import.es"
+        )
+        is None
+    )
+
+
+async def test_read_users_pages_with_cursor(
+    client: AsyncClient, db_session: AsyncSession, admin_auth_headers: dict[str, str]
+) -> None:
+    await user_crud.insert_users(
+        session=db_session,
+        rows=[
+            {
+                "id": uuid.uuid4(),
+                "email": f"page{i}@list.es",
+                "hashed_password": "x",
+                "is_admin": False,
+                "version": 0,
+            }
+            for i in range(5)
+        ],
+    )
+
+    # Follow the cursors until the last page
+    emails: list[str] = []
+    params: dict[str, str | int] = {"limit": 2, "count": "exact"}
+    while True:
+        response = await client.get(
+            f"{settings.ROUTER_API_V1_PREFIX}/users",
+            headers=admin_auth_headers,
+            params=params,
+        )
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        emails.extend(user["email"] for user in page["data"])
+        if page["next_cursor"] is None:
+            break
+        params = {"limit": 2, "cursor": page["next_cursor"], "count": "none"}
+
+    # Every user shows up once, in email order
+    assert emails == sorted(emails)
+    assert len(set(emails)) == len(emails)
+    assert {f"page{i}@list.es" for i in range(5)} <= set(emails)
+    assert page["count"] is None
+    assert "hashed_password" not in page["data"][0]
+
+    first_page = await client.get(
+        f"{settings.ROUTER_API_V1_PREFIX}/users",
+        headers=admin_auth_headers,
+        params={"limit": 100, "count": "exact"},
+    )
+    assert first_page.json()["count"] == len(emails)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        base64.urlsafe_b64encode(b'["a@list.es",1]').decode(),
+        base64.urlsafe_b64encode(f'[1,"{uuid.uuid4().hex}"]'.encode()).decode(),
+        base64.urlsafe_b64encode(b'{"a":1,"b":2}').decode(),
+    ],
+)
+async def test_read_users_error_invalid_cursor(
+    client: AsyncClient, admin_auth_headers: dict[str, str], cursor: str
+) -> None:
+    response = await client.get(
+        f"{settings.ROUTER_API_V1_PREFIX}/users",
+        headers=admin_auth_headers,
+        params={"cursor": cursor},
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_export_users_ndjson(
+    client: AsyncClient, db_session: AsyncSession, admin_auth_headers: dict[str, str]
+) -> None:
+    await user_crud.insert_users(
+        session=db_session,
+        rows=[
+            {
+                "id": uuid.uuid4(),
+                "email": f"export{i}@export.es",
+                "hashed_password": "secret-hash",
+                "is_admin": False,
+                "full_name": f"Export {i}",
+                "version": 0,
+            }
+            for i in range(3)
+        ],
+    )
+
+    response = await client.get(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/export", headers=admin_auth_headers
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    users = [json.loads(line) for line in response.text.splitlines()]
+    exported = {user["email"]: user for user in users}
+    assert exported["export1@export.es"]["full_name"] == "Export 1"
+    assert set(exported["export1@export.es"]) == {
+        "id",
+        "email",
+        "is_admin",
+        "full_name",
+    }
+    # The password hashes never leave the database
+    assert "secret-hash" not in response.text
+
+    count = await user_crud.count_users(session=db_session, exact=True)
+    assert len(users) == count
+
+
+async def test_export_users_csv(
+    client: AsyncClient, admin_auth_headers: dict[str, str]
+) -> None:
+    response = await client.get(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/export",
+        headers=admin_auth_headers,
+        params={"format": "csv"},
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == ["email", "is_admin", "full_name", "id"]
+    assert "admin@test.es" in {row["email"] for row in rows}
+
+
+async def test_export_users_closed_early_returns_connection(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # The shared test engine has no pool to count checkouts in
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'export.db'}",
+        poolclass=AsyncAdaptedQueuePool,
+    )
+    session_factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    async with session_factory() as session:
+        await user_crud.insert_users(
+            session=session,
+            rows=[
+                {
+                    "id": uuid.uuid4(),
+                    "email": f"early{i}@export.es",
+                    "hashed_password": "secret-hash",
+                    "is_admin": False,
+                    "full_name": None,
+                    "version": 0,
+                }
+                for i in range(3)
+            ],
+        )
+    monkeypatch.setattr(settings, "USER_EXPORT_BATCH_SIZE", 1)
+    checked_out = engine.pool.checkedout()  # type: ignore[attr-defined]
+
+    try:
+        export = _export_users(session_factory, "ndjson")
+        assert b"early0@export.es" in await anext(export)
+        assert engine.pool.checkedout() == checked_out + 1  # type: ignore[attr-defined]
+
+        await export.aclose()
+
+        assert engine.pool.checkedout() == checked_out  # type: ignore[attr-defined]
+    finally:
+        await engine.dispose()
+
+
+async def test_signup_success(client: AsyncClient) -> None:
+    response = await client.post(
+        f"{settings.ROUTER_API_V1_PREFIX}/users/signup",
+        json={"email": "signup@signup.es", "password": "signuppassword"},
+    )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["email"] == "signup@signup.es"
+    assert response.json()["is_admin"] is False
+    # New users are added to the filter as they are created
+    assert "signup@signup.es" in user_crud.registered_emails
+
+
+async def test_signup_duplicate_email(client: AsyncClient) -> None:
+    url = f"{settings.ROUTER_API_V1_PREFIX}/users/signup"
+    user_data = {"email": "twice@signup.es", "password": "signuppassword"}
+    response = await client.post(url, json=user_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = await client.post(url, json=user_data)
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    # A filter that missed the email still falls back on the unique index
+    user_crud.registered_emails_loaded.set()
+    user_crud.registered_emails.clear()
+    try:
+        response = await client.post(url, json=user_data)
+    finally:
+        user_crud.registered_emails_loaded.clear()
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+
+async def test_signup_error_throttled(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    url = f"{settings.ROUTER_API_V1_PREFIX}/users/signup"
+    for i in range(settings.SIGNUP_RATE_LIMIT_IP_BURST):
+        response = await client.post(
+            url, json={"email": f"burst{i}@signup.es", "password": "signuppassword"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    # Throttled sign-ups never reach the database or the password hash
+    async def fail_register_user(**kwargs: Any) -> NoReturn:
+        raise AssertionError("Throttled sign-ups must not be registered")
+
+    monkeypatch.setattr(user_crud, "register_user", fail_register_user)
+
+    response = await client.post(
+        url, json={"email": "throttled@signup.es", "password": "signuppassword"}
+    )
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["Retry-After"]) > 0
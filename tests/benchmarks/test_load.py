@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+
+from typing import Any
+
+import pytest
+
+from benchmarks.load.__main__ import parse_mix
+from benchmarks.load.report import compare_runs
+
+
+def make_run(**results: dict[str, float]) -> dict[str, Any]:
+    return {"meta": {"transport": "asgi", "database": "sqlite"}, "results": results}
+
+
+def summary(
+    *, throughput: float = 100.0, p95_ms: float = 10.0, errors: float = 0.0
+) -> dict[str, float]:
+    return {
+        "requests": 1000.0,
+        "errors": errors,
+        "throughput": throughput,
+        "p95_ms": p95_ms,
+    }
+
+
+def test_parse_mix_weights() -> None:
+    assert parse_mix("login=1, refresh=2.5,me=20") == {
+        "login": 1.0,
+        "refresh": 2.5,
+        "me": 20.0,
+    }
+    # The last weight given for an operation wins
+    assert parse_mix("me=1,me=3") == {"me": 3.0}
+
+
+@pytest.mark.parametrize(
+    ("value", "error"),
+    [
+        ("logout=1", "Unknown operation 'logout'"),
+        ("", "Unknown operation ''"),
+        ("me", "Invalid weight ''"),
+        ("me=often", "Invalid weight 'often'"),
+        ("login=1,,me=2", "Unknown operation ''"),
+    ],
+)
+def test_parse_mix_malformed(value: str, error: str) -> None:
+    with pytest.raises(argparse.ArgumentTypeError, match=error):
+        parse_mix(value)
+
+
+def test_compare_runs_same_results() -> None:
+    run = make_run(me=summary())
+
+    assert compare_runs(run, run, threshold=0.1) == []
+
+
+def test_compare_runs_threshold() -> None:
+    baseline = make_run(me=summary(throughput=100.0, p95_ms=10.0))
+    # Within the threshold, or better, is not a regression
+    within = make_run(me=summary(throughput=90.0, p95_ms=5.0))
+    slower = make_run(me=summary(throughput=89.0, p95_ms=11.5))
+
+    assert compare_runs(baseline, within, threshold=0.1) == []
+    assert compare_runs(baseline, slower, threshold=0.1) == [
+        "me throughput -11.0%",
+        "me p95_ms +15.0%",
+    ]
+    assert compare_runs(baseline, slower, threshold=0.2) == []
+
+
+def test_compare_runs_error_rate_always_regresses() -> None:
+    baseline = make_run(login=summary())
+    candidate = make_run(login=summary(errors=1.0))
+
+    assert compare_runs(baseline, candidate, threshold=1.0) == [
+        "login errors 0.00% -> 0.10%"
+    ]
+
+
+def test_compare_runs_skips_missing_operations_and_metrics(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    baseline = make_run(login=summary(), me=summary(p95_ms=0.0))
+    candidate = make_run(me={"requests": 0.0, "errors": 0.0, "throughput": 100.0})
+    candidate["meta"]["database"] = "postgresql"
+
+    assert compare_runs(baseline, candidate, threshold=0.1) == []
+    output = capsys.readouterr().out
+    assert "warning: the runs differ in database: sqlite vs postgresql" in output
+    assert "login" not in output
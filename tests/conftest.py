@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+from contextlib import nullcontext
 from typing import TYPE_CHECKING
 
+import pytest
 import pytest_asyncio
 
 from httpx import ASGITransport
@@ -11,8 +13,13 @@ from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel
 
+from fastapi_react_example_backend.core.rate_limit import rate_limit_backend
+from fastapi_react_example_backend.core.security import create_access_token
+from fastapi_react_example_backend.crud import user as user_crud
 from fastapi_react_example_backend.db.session import get_session
+from fastapi_react_example_backend.db.session import get_session_factory
 from fastapi_react_example_backend.main import app
+from fastapi_react_example_backend.models.user import UserCreate
 
 
 if TYPE_CHECKING:
@@ -24,6 +31,17 @@ TEST_ENGINE = create_async_engine(
     TEST_DATABASE_URI, connect_args={"check_same_thread": False}
 )
 
+
+class FakeClock:
+    """Clock of the caches and rate limiters that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
 TestSessionFactory = async_sessionmaker(
     autocommit=False,
     expire_on_commit=False,
@@ -33,9 +51,17 @@ TestSessionFactory = async_sessionmaker(
 )
 
 
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
 @pytest_asyncio.fixture(scope="session")
 async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient]:
     app.dependency_overrides[get_session] = lambda: db_session
+    app.dependency_overrides[get_session_factory] = lambda: (
+        lambda: nullcontext(db_session)
+    )
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -61,3 +87,19 @@ async def db_session(setup_db: None) -> AsyncGenerator[AsyncSession]:
     async with TestSessionFactory() as session:
         yield session
         await session.close()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def admin_auth_headers(db_session: AsyncSession) -> dict[str, str]:
+    admin = await user_crud.create_user(
+        session=db_session,
+        user_create=UserCreate(email="admin@test.es", password="adminpassword"),
+        is_admin=True,
+    )
+    return {"Authorization": f"Bearer {create_access_token(admin.id)}"}
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_rate_limits() -> None:
+    # Every test starts with full login buckets
+    await rate_limit_backend.clear()
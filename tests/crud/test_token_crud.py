@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+
+from fastapi_react_example_backend.core.security import hash_refresh_token
+from fastapi_react_example_backend.crud import token as token_crud
+from fastapi_react_example_backend.crud import user as user_crud
+from fastapi_react_example_backend.models.token import RefreshToken
+from fastapi_react_example_backend.models.user import UserCreate
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from fastapi_react_example_backend.models.user import User
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _create_user(db_session: AsyncSession, email: str) -> User:
+    user_create = UserCreate(email=email, password="rotatepassword")
+    return await user_crud.create_user(session=db_session, user_create=user_create)
+
+
+@pytest.mark.parametrize("delete_returning", [True, False])
+async def test_rotate_refresh_token_consumes_token_once(
+    db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch, delete_returning: bool
+) -> None:
+    # Exercise both the RETURNING path and the select-then-delete fallback
+    dialect = db_session.get_bind().dialect
+    monkeypatch.setattr(dialect, "delete_returning", delete_returning)
+
+    user = await _create_user(db_session, f"rotate{delete_returning}@test.es")
+    _, refresh_token = await token_crud.create_refresh_token(
+        session=db_session, user_id=user.id
+    )
+
+    rotated = await token_crud.rotate_refresh_token(
+        session=db_session, token=refresh_token
+    )
+    reused = await token_crud.rotate_refresh_token(
+        session=db_session, token=refresh_token
+    )
+
+    assert rotated is not None
+    new_refresh_token_db, new_refresh_token = rotated
+    assert new_refresh_token_db.user_id == user.id
+    assert new_refresh_token != refresh_token
+    assert reused is None
+    assert (
+        await token_crud.get_refresh_token(session=db_session, token=refresh_token)
+        is None
+    )
+    assert (
+        await token_crud.get_refresh_token(session=db_session, token=new_refresh_token)
+        is not None
+    )
+
+
+async def test_rotate_refresh_token_rejects_expired_token(
+    db_session: AsyncSession,
+) -> None:
+    user = await _create_user(db_session, "rotateexpired@test.es")
+    expired_refresh_token = RefreshToken(
+        token_hash=hash_refresh_token("rotate_expired_token"),
+        expires_at=datetime.now(UTC) - timedelta(minutes=1),
+        user_id=user.id,
+    )
+    db_session.add(expired_refresh_token)
+    await db_session.commit()
+
+    rotated = await token_crud.rotate_refresh_token(
+        session=db_session, token="rotate_expired_token"
+    )
+
+    assert rotated is None
+
+
+async def test_refresh_tokens_are_stored_as_digests(db_session: AsyncSession) -> None:
+    user = await _create_user(db_session, "digest@test.es")
+
+    db_refresh_token, refresh_token = await token_crud.create_refresh_token(
+        session=db_session, user_id=user.id
+    )
+
+    assert len(db_refresh_token.token_hash) == 32
+    assert db_refresh_token.token_hash == hash_refresh_token(refresh_token)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import uuid
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+import pytest
+
+from fastapi_react_example_backend.core.security import PasswordHashingPool
+from fastapi_react_example_backend.crud import user as user_crud
+from fastapi_react_example_backend.models.user import UserCreate
+from fastapi_react_example_backend.models.user import UserUpdate
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_get_user_by_id_uses_principal_cache(db_session: AsyncSession) -> None:
+    user_create = UserCreate(
+        email="cached@test.es", password="cachedpassword", full_name="Cached"
+    )
+    user = await user_crud.create_user(session=db_session, user_create=user_create)
+    stats_before = user_crud.principal_cache.stats()
+
+    # First lookup misses and fills the cache, the second one is served from it
+    first = await user_crud.get_user_by_id(
+        session=db_session, user_id=user.id, use_cache=True
+    )
+    second = await user_crud.get_user_by_id(
+        session=db_session, user_id=user.id, use_cache=True
+    )
+
+    stats_after = user_crud.principal_cache.stats()
+    assert first is not None
+    assert second is not None
+    assert second.email == user.email
+    assert stats_after["misses"] == stats_before["misses"] + 1
+    assert stats_after["hits"] == stats_before["hits"] + 1
+
+
+async def test_update_user_invalidates_principal_cache(
+    db_session: AsyncSession,
+) -> None:
+    user_create = UserCreate(
+        email="invalidate@test.es", password="invalidatepassword", full_name="Old"
+    )
+    user = await user_crud.create_user(session=db_session, user_create=user_create)
+    await user_crud.get_user_by_id(session=db_session, user_id=user.id, use_cache=True)
+
+    await user_crud.update_user(
+        session=db_session, db_user=user, user_in=UserUpdate(full_name="New")
+    )
+
+    # The stale snapshot is gone, so the next lookup sees the new name
+    assert user_crud.principal_cache.pop(user.id) is None
+    cached = await user_crud.get_user_by_id(
+        session=db_session, user_id=user.id, use_cache=True
+    )
+    assert cached is not None
+    assert cached.full_name == "New"
+    assert cached.version == user.version == 1
+
+
+async def test_create_user_if_missing_skips_hashing_existing_users(
+    db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    user_create = UserCreate(email="seed@test.es", password="seedpassword")
+
+    assert await user_crud.create_user_if_missing(
+        session=db_session, user_create=user_create, is_admin=True
+    )
+    user = await user_crud.get_user_by_email(session=db_session, email="seed@test.es")
+    assert user is not None
+    assert user.is_admin
+
+    async def fail_hashing(password: str) -> str:
+        raise AssertionError("hashed the password of an existing user")
+
+    monkeypatch.setattr(user_crud, "get_password_hash_async", fail_hashing)
+    assert not await user_crud.create_user_if_missing(
+        session=db_session, user_create=user_create, is_admin=True
+    )
+
+
+async def test_create_user_if_missing_loses_race_quietly(
+    db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    user_create = UserCreate(email="race@test.es", password="racepassword")
+    await user_crud.create_user(session=db_session, user_create=user_create)
+
+    # Another process created the user between the lookup and the insert
+    async def not_found(*, session: AsyncSession, email: str) -> None:
+        return None
+
+    monkeypatch.setattr(user_crud, "get_user_by_email", not_found)
+    assert not await user_crud.create_user_if_missing(
+        session=db_session, user_create=user_create
+    )
+
+
+async def test_insert_users_stays_under_the_bind_parameter_limit(
+    db_session: AsyncSession, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Room for two rows of six columns per statement
+    monkeypatch.setattr(user_crud, "MAX_BIND_PARAMETERS", 12)
+    statements = 0
+    execute = db_session.execute
+
+    async def count_execute(*args: Any, **kwargs: Any) -> Any:
+        nonlocal statements
+        statements += 1
+        return await execute(*args, **kwargs)
+
+    monkeypatch.setattr(db_session, "execute", count_execute)
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "email": f"bind{i}@test.es",
+            "is_admin": False,
+            "full_name": None,
+            "hashed_password": "hashed",
+            "version": 0,
+        }
+        for i in range(5)
+    ]
+
+    inserted = await user_crud.insert_users(session=db_session, rows=rows)
+
+    assert inserted == {f"bind{i}@test.es" for i in range(5)}
+    assert statements == 3
+
+
+async def test_import_hashing_waits_for_room_without_resubmitting(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # Hashes outlast the pool timeout, which imports must not give up on
+    pool = PasswordHashingPool(max_workers=1, max_pending=1, timeout=0.01)
+    monkeypatch.setattr(user_crud, "password_hashing_pool", pool)
+    hashed = []
+
+    def slow_hash(password: str) -> str:
+        time.sleep(0.05)
+        hashed.append(password)
+        return f"hashed-{password}"
+
+    monkeypatch.setattr(user_crud, "get_password_hash", slow_hash)
+    release = threading.Event()
+
+    try:
+        # A login holds the only slot, the import backs off until it is done
+        pool.submit(release.wait)
+        hashing = asyncio.create_task(user_crud._hash_passwords(["a", "b"]))
+        await asyncio.sleep(0.1)
+        release.set()
+
+        assert await hashing == ["hashed-a", "hashed-b"]
+        assert hashed == ["a", "b"]
+    finally:
+        release.set()
+        pool.shutdown()
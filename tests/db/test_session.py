@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel import select
+
+from fastapi_react_example_backend.db.session import InstrumentedAsyncQueuePool
+from fastapi_react_example_backend.db.session import ReplicaSet
+from fastapi_react_example_backend.db.session import RoutingSession
+from fastapi_react_example_backend.db.session import check_pool_liveness
+from fastapi_react_example_backend.db.session import get_pool_stats
+from fastapi_react_example_backend.db.session import pin_to_primary
+from fastapi_react_example_backend.models.user import User
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_pool_stats_track_checkouts_and_overflow(tmp_path: Path) -> None:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+
+    try:
+        # Hold two connections at once: one pooled and one overflow
+        async with engine.connect(), engine.connect():
+            stats = get_pool_stats(engine)
+            assert stats is not None
+            assert stats["checked_out"] == 2
+            assert stats["overflow"] == 1
+
+            # The pool is exhausted, so a third checkout times out
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+        stats = get_pool_stats(engine)
+        assert stats is not None
+        assert stats["checkouts"] == 2
+        assert stats["overflow_connections"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["checked_out"] == 0
+        assert stats["wait_seconds_max"] >= 0.05
+    finally:
+        await engine.dispose()
+
+
+async def test_pool_stats_unavailable_for_other_pools() -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+
+    assert get_pool_stats(engine) is None
+
+    await engine.dispose()
+
+
+async def test_check_pool_liveness(tmp_path: Path) -> None:
+    healthy_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'ok.db'}")
+    broken_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'broken.db'}"
+    )
+
+    assert await check_pool_liveness(healthy_engine) is True
+    assert await check_pool_liveness(broken_engine) is False
+
+    await healthy_engine.dispose()
+    await broken_engine.dispose()
+
+
+async def _create_database(path: Path, emails: list[str]) -> AsyncEngine:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        for email in emails:
+            session.add(User(email=email, hashed_password="not-a-real-hash"))
+        await session.commit()
+
+    return engine
+
+
+async def test_routing_session_reads_from_replicas(tmp_path: Path) -> None:
+    # Three local databases stand in for a primary and two replicas, each
+    # with a different user so we can tell where a read was served from
+    primary = await _create_database(tmp_path / "primary.db", ["primary@test.es"])
+    replicas = [
+        await _create_database(tmp_path / f"replica{i}.db", [f"replica{i}@test.es"])
+        for i in range(2)
+    ]
+    session_factory = async_sessionmaker(
+        bind=primary,
+        sync_session_class=RoutingSession,
+        replicas=ReplicaSet(replicas),
+        expire_on_commit=False,
+    )
+
+    async def read_emails(session: AsyncSession) -> list[str]:
+        result = await session.execute(select(User.email).order_by(User.email))
+        return list(result.scalars())
+
+    try:
+        # Sessions take turns across replicas and stick to the one they got
+        async with session_factory() as session:
+            assert await read_emails(session) == ["replica0@test.es"]
+            assert await read_emails(session) == ["replica0@test.es"]
+        async with session_factory() as session:
+            assert await read_emails(session) == ["replica1@test.es"]
+
+        # Writes go to the primary, and so does every read after them
+        async with session_factory() as session:
+            session.add(User(email="new@test.es", hashed_password="not-a-real-hash"))
+            await session.commit()
+            assert await read_emails(session) == ["new@test.es", "primary@test.es"]
+
+        # Sessions can also be pinned explicitly before their first read
+        async with session_factory() as session:
+            pin_to_primary(session)
+            assert await read_emails(session) == ["new@test.es", "primary@test.es"]
+    finally:
+        for engine in (primary, *replicas):
+            await engine.dispose()
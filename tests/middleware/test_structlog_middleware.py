@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import NoReturn
+
+import pytest
+
+from fastapi_react_example_backend.core.metrics import MetricsRegistry
+from fastapi_react_example_backend.middleware.structlog import AccessLogSampler
+from fastapi_react_example_backend.middleware.structlog import StructlogMiddleware
+
+
+if TYPE_CHECKING:
+    from httpx import AsyncClient
+
+
+def test_access_log_sampler_rates() -> None:
+    sampler = AccessLogSampler(
+        {"2xx": 0.5, "2xx /api/v1/users/me": 0.01, "5xx": 1.0}, rand=lambda: 0.2
+    )
+
+    # The route specific rate wins over the status class one
+    assert sampler.sample_rate("/api/v1/users/me", 200) is None
+    assert sampler.sample_rate("/api/v1/users", 204) == 0.5
+    assert sampler.sample_rate("/api/v1/users/me", 503) == 1.0
+    # Unlisted status classes are always logged
+    assert sampler.sample_rate("/api/v1/users/me", 404) == 1.0
+
+
+def test_access_log_sampler_drops_everything_at_zero() -> None:
+    sampler = AccessLogSampler({"3xx": 0.0}, rand=lambda: 0.0)
+
+    assert sampler.sample_rate("/", 307) is None
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_echoed(client: AsyncClient) -> None:
+    response = await client.get("/", headers={"X-Request-ID": "abc-123"})
+
+    assert response.headers["X-Request-ID"] == "abc-123"
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_generated(client: AsyncClient) -> None:
+    # Invalid incoming IDs are replaced rather than echoed back
+    response = await client.get("/", headers={"X-Request-ID": "bad id\t"})
+    other_response = await client.get("/")
+
+    request_id = response.headers["X-Request-ID"]
+    assert len(request_id) == 32
+    assert request_id != other_response.headers["X-Request-ID"]
+
+
+@pytest.mark.asyncio
+async def test_in_flight_gauge_recovers_from_cancelled_requests() -> None:
+    async def cancelled_app(scope: Any, receive: Any, send: Any) -> NoReturn:
+        raise asyncio.CancelledError
+
+    async def receive() -> NoReturn:
+        raise AssertionError("The body is never read")
+
+    async def send(message: Any) -> NoReturn:
+        raise AssertionError("No response is sent")
+
+    metrics = MetricsRegistry()
+    middleware = StructlogMiddleware(cancelled_app, metrics=metrics)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "http_version": "1.1",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+    }
+
+    # The cancellation goes through, with the request still accounted for
+    with pytest.raises(asyncio.CancelledError):
+        await middleware(scope, receive, send)
+
+    assert metrics.gauges["http_requests_in_flight"][""] == 0
+    (labels,) = metrics.counters["http_requests_total"]
+    assert 'status="5xx"' in labels
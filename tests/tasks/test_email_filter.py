@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import TYPE_CHECKING
+
+import pytest
+
+from fastapi_react_example_backend.crud import user as user_crud
+from fastapi_react_example_backend.models.user import UserCreate
+from fastapi_react_example_backend.tasks.email_filter import load_email_filter
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_load_email_filter(db_session: AsyncSession) -> None:
+    await user_crud.create_user(
+        session=db_session,
+        user_create=UserCreate(email="Filter@Bloom.es", password="filterpassword"),
+    )
+
+    try:
+        loaded = await load_email_filter(lambda: nullcontext(db_session))
+
+        assert loaded >= 1
+        # Emails are matched case-insensitively
+        assert user_crud.may_be_registered("filter@bloom.es")
+        assert not user_crud.may_be_registered("missing@bloom.es")
+    finally:
+        user_crud.registered_emails_loaded.clear()
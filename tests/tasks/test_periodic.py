@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from fastapi_react_example_backend.tasks.periodic import PeriodicTask
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_periodic_task_runs_until_stopped() -> None:
+    calls = 0
+    called = asyncio.Event()
+
+    async def tick() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("failures must not stop the schedule")
+        called.set()
+
+    task = PeriodicTask("test-task", tick, interval=0.001)
+    task.start()
+    await asyncio.wait_for(called.wait(), timeout=1)
+    await task.stop()
+
+    calls_after_stop = calls
+    await asyncio.sleep(0.01)
+
+    assert calls_after_stop >= 2
+    assert calls == calls_after_stop
+    assert not task.running
+
+
+async def test_periodic_task_stop_without_start() -> None:
+    async def tick() -> None:
+        pass
+
+    await PeriodicTask("idle-task", tick, interval=1).stop()
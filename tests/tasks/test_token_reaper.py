@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import pytest
+
+from sqlmodel import col
+from sqlmodel import select
+
+from fastapi_react_example_backend.core.security import hash_refresh_token
+from fastapi_react_example_backend.crud import token as token_crud
+from fastapi_react_example_backend.crud import user as user_crud
+from fastapi_react_example_backend.models.token import RefreshToken
+from fastapi_react_example_backend.models.user import UserCreate
+from fastapi_react_example_backend.tasks.token_reaper import (
+    purge_expired_refresh_tokens,
+)
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_purge_expired_refresh_tokens(db_session: AsyncSession) -> None:
+    user_create = UserCreate(email="reaper@test.es", password="reaperpassword")
+    user = await user_crud.create_user(session=db_session, user_create=user_create)
+
+    # Five expired tokens and a live one
+    for i in range(5):
+        db_session.add(
+            RefreshToken(
+                token_hash=hash_refresh_token(f"reaper_expired_{i}"),
+                expires_at=datetime.now(UTC) - timedelta(minutes=i + 1),
+                user_id=user.id,
+            )
+        )
+    await db_session.commit()
+    _, live_token = await token_crud.create_refresh_token(
+        session=db_session, user_id=user.id
+    )
+
+    # Small batches force several delete rounds in one sweep
+    purged = await purge_expired_refresh_tokens(
+        session_factory=lambda: nullcontext(db_session), batch_size=2
+    )
+
+    remaining = await db_session.execute(
+        select(RefreshToken).where(col(RefreshToken.user_id) == user.id)
+    )
+    # Other tests may have left expired tokens behind too
+    assert purged >= 5
+    assert [token.token_hash for token in remaining.scalars()] == [
+        hash_refresh_token(live_token)
+    ]
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from fastapi_react_example_backend.core.bloom import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    emails = [f"user{i}@bloom.es" for i in range(1000)]
+    for email in emails:
+        bloom.add(email)
+
+    assert all(email in bloom for email in emails)
+    assert len(bloom) == 1000
+
+
+def test_bloom_filter_false_positive_rate() -> None:
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"user{i}@bloom.es")
+
+    # Well within a few times the target rate at full capacity
+    false_positives = sum(f"other{i}@bloom.es" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+    bloom.clear()
+    assert "user1@bloom.es" not in bloom
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from fastapi_react_example_backend.core.cache import TTLCache
+
+
+if TYPE_CHECKING:
+    from tests.conftest import FakeClock
+
+
+def test_ttl_cache_hits_and_expires(clock: FakeClock) -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=5, clock=clock)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+
+    # Entries vanish once their TTL is over
+    clock.now = 5
+    assert cache.get("a") is None
+
+    assert cache.stats() == {"size": 0, "max_size": 10, "hits": 1, "misses": 2}
+
+
+def test_ttl_cache_honours_earlier_expiry(clock: FakeClock) -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=5, clock=clock)
+
+    cache.set("short", 1, expires_at=1)
+    cache.set("capped", 2, expires_at=100)
+
+    clock.now = 1
+    assert cache.get("short") is None
+    assert cache.get("capped") == 2
+
+    # An explicit expiry never outlives the default TTL
+    clock.now = 5
+    assert cache.get("capped") is None
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_ttl_cache_disabled_with_zero_size() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=0, ttl=60)
+
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_pop_and_clear() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+
+    cache.clear()
+    assert cache.get("b") is None
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import TYPE_CHECKING
+
+import pytest
+
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.crud import user as user_crud
+from fastapi_react_example_backend.initial_data import init_db
+
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_init_db_is_idempotent(db_session: AsyncSession) -> None:
+    def session_factory() -> nullcontext[AsyncSession]:
+        return nullcontext(db_session)
+
+    await init_db(session_factory)
+    admin = await user_crud.get_user_by_email(
+        session=db_session, email=settings.ADMIN_EMAIL
+    )
+    assert admin is not None
+    assert admin.is_admin
+
+    # Seeding again finds the admin and leaves it alone
+    assert await init_db(session_factory) is False
+    await db_session.refresh(admin)
+    assert admin.version == 0
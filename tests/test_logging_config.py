@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import atexit
+import io
+import json
+import logging
+import queue
+import sys
+import uuid
+
+from typing import TYPE_CHECKING
+from typing import Any
+
+import pytest
+
+from fastapi_react_example_backend.core import logging_config
+from fastapi_react_example_backend.core.config import settings
+from fastapi_react_example_backend.core.logging_config import BoundedQueueHandler
+from fastapi_react_example_backend.core.logging_config import BoundedQueueListener
+from fastapi_react_example_backend.core.logging_config import get_json_serializer
+from fastapi_react_example_backend.core.logging_config import setup_logging
+from fastapi_react_example_backend.core.logging_config import stop_logging
+from fastapi_react_example_backend.middleware.structlog import StructlogMiddleware
+
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from fastapi_react_example_backend.core.logging_config import JSONSerializer
+
+
+def _record(message: str) -> logging.LogRecord:
+    return logging.makeLogRecord({"msg": message})
+
+
+def test_bounded_queue_handler_drops_new_records() -> None:
+    log_queue: queue.Queue[Any] = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, overflow_policy="drop")
+
+    for message in ("a", "b", "c"):
+        handler.emit(_record(message))
+
+    assert [log_queue.get_nowait().msg for _ in range(2)] == ["a", "b"]
+    assert handler.stats() == {"size": 0, "max_size": 2, "dropped": 1}
+
+
+def test_bounded_queue_handler_drops_oldest_records() -> None:
+    log_queue: queue.Queue[Any] = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, overflow_policy="drop_oldest")
+
+    for message in ("a", "b", "c"):
+        handler.emit(_record(message))
+
+    assert [log_queue.get_nowait().msg for _ in range(2)] == ["b", "c"]
+    assert handler.dropped == 1
+
+
+def test_bounded_queue_listener_flushes_on_stop() -> None:
+    class ListHandler(logging.Handler):
+        def __init__(self) -> None:
+            super().__init__()
+            self.messages: list[str] = []
+
+        def emit(self, record: logging.LogRecord) -> None:
+            self.messages.append(record.getMessage())
+
+    log_queue: queue.Queue[Any] = queue.Queue(maxsize=2)
+    handler = BoundedQueueHandler(log_queue, overflow_policy="block")
+    target = ListHandler()
+    listener = BoundedQueueListener(log_queue, target)
+
+    # Fill the queue before the listener runs, stopping must still drain it
+    handler.emit(_record("a"))
+    handler.emit(_record("b"))
+    listener.start()
+    listener.stop()
+
+    assert target.messages == ["a", "b"]
+
+
+@pytest.mark.parametrize("name", ["json", "pydantic_core"])
+def test_json_serializers_render_the_same(name: JSONSerializer) -> None:
+    dumps = get_json_serializer(name)
+    event = {"event": "hello", "user_id": uuid.UUID(int=1), "n": 1}
+
+    rendered = dumps(event, default=str)
+
+    assert json.loads(rendered) == {
+        "event": "hello",
+        "user_id": "00000000-0000-0000-0000-000000000001",
+        "n": 1,
+    }
+
+
+@pytest.fixture
+def queued_json_logging(
+    monkeypatch: pytest.MonkeyPatch,
+) -> Iterator[tuple[io.StringIO, list[object]]]:
+    """Log through the queue as JSON, to a buffer, spying on exit handlers."""
+    stream = io.StringIO()
+    registered_at_exit: list[object] = []
+    monkeypatch.setattr(sys, "stderr", stream)
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+    monkeypatch.setattr(settings, "LOG_QUEUE_ENABLED", True)
+    monkeypatch.setattr(logging_config, "_stop_registered_at_exit", False)
+    monkeypatch.setattr(atexit, "register", registered_at_exit.append)
+    setup_logging()
+    yield stream, registered_at_exit
+
+    stop_logging()
+    monkeypatch.undo()
+    setup_logging()
+
+
+@pytest.mark.asyncio
+async def test_queued_stdlib_records_keep_the_request_id(
+    queued_json_logging: tuple[io.StringIO, list[object]],
+) -> None:
+    async def app(scope: Any, receive: Any, send: Any) -> None:
+        logging.getLogger("tests.stdlib").warning("inside %s", "a request")
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Any) -> None:
+        pass
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": b"",
+        "http_version": "1.1",
+        "headers": [(b"x-request-id", b"stdlib-request")],
+        "client": ("127.0.0.1", 50000),
+    }
+    await StructlogMiddleware(app)(scope, receive, send)
+    # Written out by the listener thread
+    stop_logging()
+
+    stream, _ = queued_json_logging
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    (record,) = [line for line in lines if line["logger"] == "tests.stdlib"]
+    assert record["event"] == "inside a request"
+    assert record["request_id"] == "stdlib-request"
+
+
+def test_setup_logging_stops_the_queue_at_exit_once(
+    queued_json_logging: tuple[io.StringIO, list[object]],
+) -> None:
+    setup_logging()
+    setup_logging()
+
+    _, registered_at_exit = queued_json_logging
+    assert registered_at_exit == [stop_logging]
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+
+from typing import TYPE_CHECKING
+
+from fastapi_react_example_backend.core.metrics import HistogramSnapshot
+from fastapi_react_example_backend.core.metrics import MetricsRegistry
+from fastapi_react_example_backend.core.metrics import MetricsSnapshot
+from fastapi_react_example_backend.core.metrics import MultiprocessStore
+from fastapi_react_example_backend.core.metrics import format_labels
+from fastapi_react_example_backend.core.metrics import merge_snapshots
+from fastapi_react_example_backend.core.metrics import render_prometheus
+
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_registry_histogram_buckets() -> None:
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    labels = format_labels(route="/items/{id}")
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        metrics.observe("latency", labels, value)
+
+    # Bucket upper bounds are inclusive, the last bucket is +Inf
+    histogram = metrics.snapshot()["histograms"]["latency"][labels]
+    assert histogram == {"buckets": [2, 1, 1], "sum": 3.65, "count": 4}
+
+
+def test_render_prometheus() -> None:
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    metrics.inc("requests_total", format_labels(status="2xx"))
+    metrics.inc("requests_total", format_labels(status="2xx"))
+    metrics.set_gauge("in_flight", "", 1)
+    metrics.observe("latency", format_labels(route="/"), 0.5)
+
+    rendered = render_prometheus(metrics.snapshot(), metrics.buckets).splitlines()
+
+    assert rendered == [
+        "# TYPE requests_total counter",
+        'requests_total{status="2xx"} 2',
+        "# TYPE in_flight gauge",
+        "in_flight 1",
+        "# TYPE latency histogram",
+        'latency_bucket{route="/",le="0.1"} 0',
+        'latency_bucket{route="/",le="1"} 1',
+        'latency_bucket{route="/",le="+Inf"} 1',
+        'latency_sum{route="/"} 0.5',
+        'latency_count{route="/"} 1',
+    ]
+
+
+def test_format_labels_escapes_values() -> None:
+    assert format_labels(path='a"b\\c') == 'path="a\\"b\\\\c"'
+
+
+def test_merge_snapshots_drops_gauges_of_dead_workers(tmp_path: Path) -> None:
+    dead_pid = 2**22 + 1  # above the default pid_max, never a live process
+    store = MultiprocessStore(tmp_path)
+    for pid in (os.getpid(), dead_pid):
+        store.write(
+            MetricsSnapshot(
+                pid=pid,
+                counters={"requests_total": {"": 2}},
+                gauges={"in_flight": {"": 1}},
+                histograms={
+                    "latency": {"": HistogramSnapshot(buckets=[1, 0], sum=0.1, count=1)}
+                },
+            )
+        )
+
+    merged = merge_snapshots(store.read_all())
+
+    # Totals keep the contribution of exited workers, gauges do not
+    assert merged["counters"] == {"requests_total": {"": 4}}
+    assert merged["gauges"] == {"in_flight": {"": 1}}
+    assert merged["histograms"]["latency"][""]["buckets"] == [2, 0]
+    assert merged["histograms"]["latency"][""]["count"] == 2
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from fastapi_react_example_backend.core.rate_limit import InMemoryRateLimitBackend
+from fastapi_react_example_backend.core.rate_limit import RateLimiter
+
+
+if TYPE_CHECKING:
+    from tests.conftest import FakeClock
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_rate_limiter_allows_bursts_then_refills(clock: FakeClock) -> None:
+    backend = InMemoryRateLimitBackend(max_keys=10, clock=clock)
+    limiter = RateLimiter("login", per_minute=6, burst=2, backend=backend)
+
+    assert await limiter.hit("a") == 0
+    assert await limiter.hit("a") == 0
+    # One token every 10 seconds
+    assert await limiter.hit("a") == 10
+    assert await limiter.hit("b") == 0
+
+    clock.now = 10
+    assert await limiter.hit("a") == 0
+    assert await limiter.hit("a") == 10
+
+
+async def test_in_memory_backend_evicts_idle_and_old_keys(clock: FakeClock) -> None:
+    backend = InMemoryRateLimitBackend(max_keys=2, clock=clock)
+
+    await backend.consume("a", rate=1, burst=1)
+    await backend.consume("b", rate=1, burst=1)
+    await backend.consume("c", rate=1, burst=1)
+
+    # The least recently used key made room for the new one
+    assert len(backend) == 2
+    assert await backend.consume("a", rate=1, burst=1) == 0
+
+    # Buckets that refilled completely are dropped
+    clock.now = 5
+    await backend.consume("d", rate=1, burst=1)
+    assert len(backend) == 1
+
+
+async def test_rate_limiter_check_does_not_count_a_hit(clock: FakeClock) -> None:
+    backend = InMemoryRateLimitBackend(max_keys=10, clock=clock)
+    limiter = RateLimiter("login", per_minute=6, burst=1, backend=backend)
+
+    assert await limiter.check("a") == 0
+    assert await limiter.check("a") == 0
+    assert await limiter.hit("a") == 0
+    assert await limiter.check("a") == 10
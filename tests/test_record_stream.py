@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+
+from fastapi_react_example_backend.core.record_stream import ParsedRecord
+from fastapi_react_example_backend.core.record_stream import RecordStreamError
+from fastapi_react_example_backend.core.record_stream import iter_lines
+from fastapi_react_example_backend.core.record_stream import iter_records
+
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncGenerator
+
+
+pytestmark = pytest.mark.asyncio
+
+
+async def _chunks(*chunks: bytes) -> AsyncGenerator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def test_iter_lines_joins_chunks() -> None:
+    lines = [line async for line in iter_lines(_chunks(b"a", b"b\r\nc", b"\nd"))]
+
+    assert lines == [b"ab", b"c", b"d"]
+
+
+async def test_iter_lines_rejects_long_lines() -> None:
+    with pytest.raises(RecordStreamError):
+        async for _ in iter_lines(_chunks(b"abc", b"def\n"), max_line_bytes=5):
+            pass
+
+
+async def test_iter_records_csv() -> None:
+    upload = _chunks("﻿email,name\n".encode(), b"a@a.es,\n\n\xff,x\n")
+
+    records = [record async for record in iter_records(upload, "csv")]
+
+    # The byte order mark is dropped and empty cells are left out
+    assert records == [
+        ParsedRecord(2, data={"email": "a@a.es"}),
+        ParsedRecord(4, error="Invalid UTF-8"),
+    ]
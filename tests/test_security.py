@@ -1,7 +1,26 @@
 from __future__ import annotations
 
+import threading
+import uuid
+
+from datetime import timedelta
+
+import pytest
+
+from fastapi_react_example_backend.core.security import InvalidAccessTokenError
+from fastapi_react_example_backend.core.security import PasswordHashingBusyError
+from fastapi_react_example_backend.core.security import PasswordHashingPool
+from fastapi_react_example_backend.core.security import access_token_keys
+from fastapi_react_example_backend.core.security import calibrate_bcrypt_rounds
+from fastapi_react_example_backend.core.security import create_access_token
+from fastapi_react_example_backend.core.security import decode_access_token
 from fastapi_react_example_backend.core.security import get_password_hash
+from fastapi_react_example_backend.core.security import get_password_hash_async
+from fastapi_react_example_backend.core.security import password_needs_rehash
+from fastapi_react_example_backend.core.security import pwd_context
+from fastapi_react_example_backend.core.security import verified_token_cache
 from fastapi_react_example_backend.core.security import verify_password
+from fastapi_react_example_backend.core.security import verify_password_async
 
 
 def test_password_hashing_and_verification() -> None:
@@ -12,3 +31,95 @@ def test_password_hashing_and_verification() -> None:
     assert plain_password != hashed_password
     assert verify_password(plain_password, hashed_password) is True
     assert verify_password("wrong_password", hashed_password) is False
+
+
+def test_password_needs_rehash_at_another_cost() -> None:
+    cheaper_hash = pwd_context.handler("bcrypt").using(rounds=4).hash("password")
+
+    assert password_needs_rehash(cheaper_hash) is True
+    assert password_needs_rehash(get_password_hash("password")) is False
+
+
+def test_calibrate_bcrypt_rounds() -> None:
+    # Every round doubles the work, from 1 ms at bcrypt's minimum cost
+    def measure(rounds: int, *, samples: int) -> float:
+        return 0.001 * 2.0 ** (rounds - 4)
+
+    rounds, timings = calibrate_bcrypt_rounds(0.1, measure=measure)
+
+    assert rounds == 10
+    # Measuring stops at the first cost over the target
+    assert list(timings) == list(range(4, 12))
+
+    # A target no cost can meet still gets the minimum cost
+    rounds, timings = calibrate_bcrypt_rounds(0.0001, measure=measure)
+    assert rounds == 4
+    assert list(timings) == [4]
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_and_verification_async() -> None:
+    plain_password = "my_secure_password"
+    hashed_password = await get_password_hash_async(plain_password)
+
+    assert plain_password != hashed_password
+    assert await verify_password_async(plain_password, hashed_password) is True
+    assert await verify_password_async("wrong_password", hashed_password) is False
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_pool_rejects_when_queue_is_full() -> None:
+    pool = PasswordHashingPool(max_workers=1, max_pending=1, timeout=0.05)
+    release = threading.Event()
+
+    try:
+        # The first call occupies the only slot and times out waiting for it
+        with pytest.raises(PasswordHashingBusyError, match="timed out"):
+            await pool.run(release.wait)
+
+        # While it is still running, no other call can be queued
+        with pytest.raises(PasswordHashingBusyError, match="queue is full"):
+            await pool.run(str, "never runs")
+
+        # Once the worker finishes, the slot is released again
+        release.set()
+        pool.shutdown(wait=True)
+        assert await pool.run(str, "runs") == "runs"
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_decode_access_token_is_memoized() -> None:
+    user_id = uuid.uuid4()
+    token = create_access_token(user_id)
+    stats_before = verified_token_cache.stats()
+
+    first_user_id, _ = decode_access_token(token)
+    second_user_id, _ = decode_access_token(token)
+
+    stats_after = verified_token_cache.stats()
+    assert first_user_id == second_user_id == user_id
+    assert stats_after["misses"] == stats_before["misses"] + 1
+    assert stats_after["hits"] == stats_before["hits"] + 1
+
+
+def test_decode_access_token_rejects_invalid_tokens() -> None:
+    expired_token = create_access_token(
+        uuid.uuid4(), expires_delta=timedelta(seconds=-1)
+    )
+    size_before = len(verified_token_cache)
+
+    with pytest.raises(InvalidAccessTokenError):
+        decode_access_token("invalid_token")
+    with pytest.raises(InvalidAccessTokenError):
+        decode_access_token(expired_token)
+    with pytest.raises(InvalidAccessTokenError):
+        decode_access_token(create_access_token("not-a-uuid"))
+
+    # Signed with a valid key, but never expiring
+    with pytest.raises(InvalidAccessTokenError, match="no expiry"):
+        decode_access_token(access_token_keys.sign({"sub": str(uuid.uuid4())}))
+
+    # Failed verifications are never cached
+    assert len(verified_token_cache) == size_before